@@ -0,0 +1,153 @@
+"""Population-level analytics over every user's cycle history.
+
+Reads the per-user cycle logs straight from the data folder, spreads them
+over a process pool in chunks, and writes a columnar summary (NumPy .npz,
+one array per column) with per-user statistics and overall distributions:
+    python analytics.py --out summary.npz --workers 8
+"""
+import argparse
+import glob
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+from cycle_array import FLOWS
+from cycle_store import DATA_DIR, read_log
+from prediction import cycles_to_arrays, gap_statistics
+
+# Number of user logs each worker task reads
+CHUNK_SIZE = 256
+
+# Histogram sizes: the last bin collects everything at or above it
+MAX_CYCLE_LENGTH = 90
+MAX_PERIOD_DAYS = 15
+
+# Typical cycle lengths; users outside them, or varying by more than
+# IRREGULAR_RANGE_DAYS between shortest and longest cycle, are flagged
+SHORT_CYCLE_DAYS = 21
+LONG_CYCLE_DAYS = 35
+IRREGULAR_RANGE_DAYS = 9
+
+# Bits of the "flags" column
+FLAG_IRREGULAR = 1
+FLAG_SHORT = 2
+FLAG_LONG = 4
+
+COLUMNS = ("user", "cycles", "mean_gap", "median_gap", "std_gap", "mean_cycle_length",
+           "min_cycle_length", "max_cycle_length", "mean_period_days") + FLOWS + ("flags",)
+
+
+def log_paths(data_dir=DATA_DIR):
+    """Return every user's cycle log, shard folder by shard folder."""
+    return sorted(glob.glob(os.path.join(data_dir, "cycles", "*", "*.log")))
+
+
+def summarise_chunk(paths):
+    """Summarise a list of user logs. Runs in a worker process."""
+    users = [os.path.basename(path)[:-len(".log")] for path in paths]  # The username hash
+    cycles_by_user = [read_log(path)[0] for path in paths]
+    starts, ends, offsets = cycles_to_arrays(cycles_by_user)
+    n_users = len(paths)
+
+    # Gaps (end of one period to the start of the next), as the tracker predicts with
+    stats = gap_statistics(starts, ends, offsets)
+
+    cycle_user = np.repeat(np.arange(n_users), np.diff(offsets))
+    counts = np.diff(offsets)
+
+    # Cycle length: start of one period to the start of the next
+    same_user = cycle_user[1:] == cycle_user[:-1]
+    lengths = (starts[1:] - starts[:-1])[same_user]
+    length_user = cycle_user[1:][same_user]
+    length_count = np.bincount(length_user, minlength=n_users)
+    has_lengths = length_count > 0
+    mean_length = np.where(has_lengths, np.bincount(length_user, weights=lengths, minlength=n_users) / np.maximum(length_count, 1), np.nan)
+    min_length = np.full(n_users, np.iinfo(np.int64).max)
+    max_length = np.full(n_users, np.iinfo(np.int64).min)
+    np.minimum.at(min_length, length_user, lengths)
+    np.maximum.at(max_length, length_user, lengths)
+    min_length = np.where(has_lengths, min_length, -1)
+    max_length = np.where(has_lengths, max_length, -1)
+
+    # Period duration in days, counting both the first and last day
+    durations = ends - starts + 1
+    mean_duration = np.where(counts > 0, np.bincount(cycle_user, weights=durations, minlength=n_users) / np.maximum(counts, 1), np.nan)
+
+    # Flow mix per user: flows are coded by their position in FLOWS
+    flow_codes = np.fromiter((FLOWS.index(c["flow"]) if c["flow"] in FLOWS else 0 for cycles in cycles_by_user for c in cycles),
+                             dtype=np.int64, count=len(starts))
+    flow_counts = np.bincount(cycle_user * len(FLOWS) + flow_codes, minlength=n_users * len(FLOWS)).reshape(n_users, len(FLOWS))
+
+    flags = np.zeros(n_users, dtype=np.uint8)
+    flags |= np.where(has_lengths & (max_length - min_length > IRREGULAR_RANGE_DAYS), FLAG_IRREGULAR, 0).astype(np.uint8)
+    flags |= np.where(has_lengths & (mean_length < SHORT_CYCLE_DAYS), FLAG_SHORT, 0).astype(np.uint8)
+    flags |= np.where(has_lengths & (mean_length > LONG_CYCLE_DAYS), FLAG_LONG, 0).astype(np.uint8)
+
+    columns = {
+        "user": np.array(users),
+        "cycles": counts.astype(np.int32),
+        "mean_gap": stats["mean"],
+        "median_gap": stats["median"],
+        "std_gap": stats["std"],
+        "mean_cycle_length": mean_length,
+        "min_cycle_length": min_length.astype(np.int32),
+        "max_cycle_length": max_length.astype(np.int32),
+        "mean_period_days": mean_duration,
+        "flags": flags,
+    }
+    for index, flow in enumerate(FLOWS):
+        columns[flow] = flow_counts[:, index].astype(np.int32)
+
+    histograms = {
+        "cycle_length_hist": np.bincount(np.clip(lengths, 0, MAX_CYCLE_LENGTH), minlength=MAX_CYCLE_LENGTH + 1),
+        "period_days_hist": np.bincount(np.clip(durations, 0, MAX_PERIOD_DAYS), minlength=MAX_PERIOD_DAYS + 1),
+        "flow_totals": flow_counts.sum(axis=0),
+    }
+    return columns, histograms
+
+
+def run(data_dir=DATA_DIR, out="summary.npz", workers=None, chunk_size=CHUNK_SIZE):
+    """Summarise every user's history with a process pool and write the .npz file. Returns the result."""
+    paths = log_paths(data_dir)
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+    parts = []
+    with Pool(processes=workers) as pool:
+        # imap keeps chunk order, so the users come out in the same order as log_paths()
+        for part in pool.imap(summarise_chunk, chunks):
+            parts.append(part)
+
+    if parts:
+        columns = {name: np.concatenate([part[0][name] for part in parts]) for name in COLUMNS}
+        histograms = {name: sum(part[1][name] for part in parts) for name in parts[0][1]}
+    else:
+        columns, histograms = summarise_chunk([])
+
+    np.savez_compressed(out, **columns, **histograms)
+    return columns, histograms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="folder holding the cycle logs")
+    parser.add_argument("--out", default="summary.npz", help="summary file to write")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="user logs per worker task")
+    args = parser.parse_args()
+
+    columns, histograms = run(args.data_dir, args.out, args.workers, args.chunk_size)
+    users = len(columns["user"])
+    print(f"Summarised {users} users, {int(columns['cycles'].sum())} cycles -> {args.out}")
+    if users:
+        lengths = histograms["cycle_length_hist"]
+        if lengths.sum():
+            print(f"  most common cycle length: {int(lengths.argmax())} days")
+        print(f"  flow mix: " + ", ".join(f"{flow} {int(total)}" for flow, total in zip(FLOWS, histograms["flow_totals"])))
+        print(f"  irregular: {int(np.count_nonzero(columns['flags'] & FLAG_IRREGULAR))}, "
+              f"short: {int(np.count_nonzero(columns['flags'] & FLAG_SHORT))}, "
+              f"long: {int(np.count_nonzero(columns['flags'] & FLAG_LONG))}")
+
+
+if __name__ == "__main__":
+    main()
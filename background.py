@@ -0,0 +1,65 @@
+# How often (in milliseconds) the Tk loop checks for finished background work
+POLL_MS = 50
+
+
+# Class to run slow work off the Tk event loop and hand the results back to it
+class BackgroundRunner:
+    def __init__(self, root, workers=1, poll_ms=POLL_MS):
+        """Create a runner for a Tk root. With one worker, tasks run in the order they were submitted."""
+        self.root = root
+        self.poll_ms = poll_ms
+        self.workers = workers
+        self._executor = None  # Created on first use, so starting the app does not import concurrent.futures
+        self._pending = []  # (future, on_done, on_error) still waiting to be reported
+        self._polling = False
+
+    def submit(self, function, *args, on_done=None, on_error=None):
+        """Run function(*args) in the background.
+
+        on_done(result) or on_error(exception) is then called on the Tk thread,
+        so it is safe for them to update widgets.
+        """
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        future = self._executor.submit(function, *args)
+        self._pending.append((future, on_done, on_error))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return future
+
+    def shutdown(self, wait=False, cancel_futures=True):
+        """Stop accepting work; tasks that have not started yet are cancelled unless cancel_futures is False.
+
+        With wait=True this returns only once the running task (and, without
+        cancelling, every queued task) has finished.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        self._pending = []
+
+    def _poll(self):
+        """Report finished tasks (on the Tk thread) and check again later if any are left."""
+        # One done() check per task: a task finishing part way through still lands in exactly one list
+        finished, still_pending = [], []
+        for task in self._pending:
+            (finished if task[0].done() else still_pending).append(task)
+        self._pending = still_pending
+
+        for future, on_done, on_error in finished:
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                if on_error is None:
+                    raise error  # Let Tk's error reporting show it
+                on_error(error)
+            elif on_done is not None:
+                on_done(future.result())
+
+        if self._pending:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,335 @@
+"""Benchmarks for the Menstrual Tracker.
+
+Run one of the benchmarks from the project folder, for example:
+    python benchmark.py login
+    python benchmark.py dates
+    python benchmark.py startup --check
+    python benchmark.py core --users 50 --cycles 24 --save before.json
+    python benchmark.py core --users 50 --cycles 24 --baseline before.json
+
+Set TRACKER_TIMINGS=1 or TRACKER_PROFILE=<file> to also get the
+instrumentation counters or a cProfile of the run (see instrumentation.py).
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import dates
+import instrumentation
+import passwords
+from core import MenstrualTracker
+from cycle_array import FLOWS
+from period_calendar import PeriodCalendar
+from prediction_cache import prediction_cache
+from user_store import UserStore
+
+# Budget for importing everything needed to draw the login window (python -X importtime)
+STARTUP_TARGET_MS = 50
+
+# Modules that should only be imported after a successful login
+DEFERRED_MODULES = ("tracker", "tkcalendar", "numpy", "prediction", "period_calendar", "core", "cycle_store", "cycle_array")
+
+
+def percentile(samples, fraction):
+    """Return the value below which the given fraction of the samples fall."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, samples):
+    """Print throughput and latency figures for a list of timings in seconds, and return them."""
+    total = sum(samples)
+    figures = {"ops_per_s": len(samples) / total, "p50_ms": statistics.median(samples) * 1000,
+               "p99_ms": percentile(samples, 0.99) * 1000}
+    print(f"  {name:<24} {figures['ops_per_s']:10.1f} ops/s"
+          f"   p50 {figures['p50_ms']:8.3f} ms"
+          f"   p99 {figures['p99_ms']:8.3f} ms")
+    return figures
+
+
+def time_calls(function, items):
+    """Call function(item) for each item and return the time each call took in seconds."""
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        function(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# Function to make up a believable cycle history
+def synthetic_cycles(count, rng, first=date(2015, 1, 1)):
+    """Return count (start, end, flow) cycles, about four weeks apart and three to seven days long."""
+    cycles = []
+    start = first + timedelta(days=rng.randint(0, 27))
+    usual_gap = rng.randint(22, 30)  # Each user has their own rhythm
+    for _ in range(count):
+        length = rng.randint(2, 6)
+        cycles.append((start, start + timedelta(days=length), rng.choice(FLOWS)))
+        start += timedelta(days=length + max(10, usual_gap + rng.randint(-3, 3)))
+    return cycles
+
+
+# Function to make up many users with the same number of cycles each
+def synthetic_users(users, cycles, seed=0):
+    """Return {username: synthetic cycles} for the given number of users."""
+    rng = random.Random(seed)  # Same seed, same data, so runs can be compared
+    return {f"user{i}": synthetic_cycles(cycles, rng) for i in range(users)}
+
+
+# Class to stand in for a tkcalendar Calendar when there is no display
+class HeadlessCalendar:
+    """Has the Calendar methods PeriodCalendar uses, and keeps the events in a dict."""
+
+    def __init__(self, month, year):
+        self.month, self.year = month, year
+        self.events = {}  # id -> (date, text, tags)
+        self._next_id = 0
+        self._bindings = {}
+
+    def bind(self, sequence, callback):
+        self._bindings[sequence] = callback
+
+    def get_displayed_month(self):
+        return self.month, self.year
+
+    def calevent_create(self, day, text, tags):
+        self._next_id += 1
+        self.events[self._next_id] = (day, text, tags)
+        return self._next_id
+
+    def calevent_remove(self, *ids):
+        for event_id in ids:
+            self.events.pop(event_id, None)
+
+    def show_month(self, month, year):
+        """Switch month like the arrow buttons do, firing <<CalendarMonthChanged>>."""
+        self.month, self.year = month, year
+        callback = self._bindings.get("<<CalendarMonthChanged>>")
+        if callback:
+            callback(None)
+
+
+def bench_login(costs, users, logins):
+    """Measure login throughput and latency for each scrypt cost (N)."""
+    original_n = passwords.SCRYPT_N
+    try:
+        for n in costs:
+            passwords.SCRYPT_N = n
+            with tempfile.TemporaryDirectory() as folder:
+                store = UserStore(os.path.join(folder, "users.db"), legacy_path=None)
+                store.import_users((f"user{i}", passwords.hash_password("secret")) for i in range(users))
+                cache = passwords.CredentialCache()
+                names = [f"user{i % users}" for i in range(logins)]
+
+                print(f"scrypt N={n}")
+                # Cold: every login pays the full key derivation cost
+                samples = []
+                for name in names:
+                    start = time.perf_counter()
+                    passwords.authenticate(store, name, "secret", cache=None)
+                    samples.append(time.perf_counter() - start)
+                report("cold (no cache)", samples)
+
+                # Warm: the same users log in again and hit the credential cache
+                for name in names:
+                    passwords.authenticate(store, name, "secret", cache=cache)
+                samples = []
+                for name in names:
+                    start = time.perf_counter()
+                    passwords.authenticate(store, name, "secret", cache=cache)
+                    samples.append(time.perf_counter() - start)
+                report("warm (cached)", samples)
+    finally:
+        passwords.SCRYPT_N = original_n
+
+
+def bench_dates(count, distinct):
+    """Compare the old strptime parsing with dates.parse_date on a column of date strings."""
+    first = date(2000, 1, 1)
+    pool = [(first + timedelta(days=i)).isoformat() for i in range(distinct)]
+    column = [random.choice(pool) for _ in range(count)]
+    print(f"{count} date strings, {distinct} distinct")
+
+    def timed(name, function):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<28} {elapsed * 1000:9.1f} ms   {count / elapsed:12.0f} dates/s")
+        return elapsed
+
+    # What add_cycle and highlight_calendar did before: strptime on every string
+    baseline = timed("strptime (old)", lambda: [datetime.strptime(text, "%Y-%m-%d").date() for text in column])
+    dates.parse_date.cache_clear()
+    cold = timed("parse_date (empty cache)", lambda: [dates.parse_date(text) for text in column])
+    warm = timed("parse_date (warm cache)", lambda: [dates.parse_date(text) for text in column])
+    dates.parse_date.cache_clear()
+    batch = timed("parse_ordinals (batch)", lambda: dates.parse_ordinals(column))
+    print(f"  speed-up over strptime: {baseline / cold:.1f}x cold, {baseline / warm:.1f}x warm, {baseline / batch:.1f}x batch")
+
+
+def import_times(module):
+    """Import a module in a fresh interpreter and return {name: (self_us, cumulative_us)}."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def bench_startup(runs, target_ms, check):
+    """Measure how long the imports before the login window take, against a target."""
+    totals = []
+    for _ in range(runs):
+        times = import_times("main")
+        totals.append(times["main"][1] / 1000)
+    median = statistics.median(totals)
+
+    print(f"import main: median {median:.1f} ms over {runs} runs (min {min(totals):.1f}, max {max(totals):.1f}), target {target_ms} ms")
+    print("  slowest modules (self time, last run):")
+    for name, (own, _) in sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:8]:
+        print(f"    {own / 1000:7.1f} ms  {name}")
+
+    loaded_early = [name for name in DEFERRED_MODULES if name in times]
+    if loaded_early:
+        print(f"  loaded before login (should be deferred): {', '.join(loaded_early)}")
+    ok = median <= target_ms and not loaded_early
+    print("  OK" if ok else "  OVER TARGET")
+    if check and not ok:
+        sys.exit(1)
+
+
+def bench_core(users, cycles, seed, save=None, baseline=None):
+    """Time the user store, adding cycles, calendar highlighting and prediction on synthetic data."""
+    histories = synthetic_users(users, cycles, seed)
+    names = list(histories)
+    results = {}
+    print(f"{users} users x {cycles} cycles")
+
+    with tempfile.TemporaryDirectory() as folder:
+        data_dir = os.path.join(folder, "data")
+
+        # The user store (what load_users/save_user in the old Gui.py did). The hash is made
+        # once and reused: "python benchmark.py login" measures the hashing itself
+        hashed = passwords.hash_password("secret")
+        store = UserStore(os.path.join(folder, "users.db"), legacy_path=None)
+        results["save_user"] = report("save_user", time_calls(lambda name: store.add_user(name, hashed), names))
+        store = UserStore(os.path.join(folder, "users.db"), legacy_path=None)  # Fresh connection, nothing cached
+        results["load_user"] = report("load_user", time_calls(store.get_password, names))
+
+        # Adding cycles typed as text, as the Add Cycle button does (each one is written to disk)
+        samples = []
+        for name in names:
+            tracker = MenstrualTracker(name, data_dir)
+            samples += time_calls(lambda cycle: tracker.add_cycle(cycle[0].isoformat(), cycle[1].isoformat(), cycle[2]),
+                                  histories[name])
+            tracker.close()
+        results["add_cycle"] = report("add_cycle", samples)
+
+        # Opening a user's saved cycles: from the snapshot written on close, then by replaying the log
+        results["load_tracker_snapshot"] = report("load_tracker (snapshot)", time_calls(lambda name: MenstrualTracker(name, data_dir), names))
+        for path in glob.glob(os.path.join(data_dir, "cycles", "*", "*.cyc")):
+            os.remove(path)
+        trackers = {}
+        results["load_tracker_log"] = report("load_tracker (log)", time_calls(
+            lambda name: trackers.__setitem__(name, MenstrualTracker(name, data_dir)), names))
+
+        # Highlighting on a calendar with no display: first the whole history at login, then one
+        # cycle at a time (the Add Cycle path), then moving back a month
+        last_start = histories[names[0]][-1][0]
+        calendars = {name: PeriodCalendar(HeadlessCalendar(last_start.month, last_start.year)) for name in names}
+        results["highlight_history"] = report("highlight_history", time_calls(
+            lambda name: calendars[name].add_periods(histories[name]), names))
+        calendars = {name: PeriodCalendar(HeadlessCalendar(last_start.month, last_start.year)) for name in names}
+        results["highlight_calendar"] = report("highlight_calendar", time_calls(
+            lambda item: calendars[item[0]].add_period(*item[1]), [(name, cycle) for name in names for cycle in histories[name]]))
+        results["change_month"] = report("change_month", time_calls(
+            lambda name: calendars[name].calendar.show_month(last_start.month % 12 + 1, last_start.year + last_start.month // 12), names))
+
+        # Predictions, one user at a time (worked out, then from the cache) and all users at once
+        trackers[names[0]].predict_next_period()  # Import NumPy before timing
+        prediction_cache.clear()
+        results["predict_next_period"] = report("predict_next_period", time_calls(lambda name: trackers[name].predict_next_period(), names))
+        results["predict_cached"] = report("predict (cached)", time_calls(lambda name: trackers[name].predict_next_period(), names))
+
+        from prediction import cycles_to_arrays, predict_batch
+
+        results["predict_batch"] = report("predict_batch (all users)", time_calls(
+            lambda arrays: predict_batch(*arrays), [cycles_to_arrays([trackers[name].cycles() for name in names])]))
+        for tracker in trackers.values():
+            tracker.close()
+
+    if save:
+        with open(save, "w") as file:
+            json.dump({"users": users, "cycles": cycles, "seed": seed, "results": results}, file, indent=2)
+        print(f"Saved to {save}")
+    if baseline:
+        compare(results, baseline, {"users": users, "cycles": cycles, "seed": seed})
+
+
+def compare(results, path, settings):
+    """Print how the median times changed against results saved earlier with --save."""
+    with open(path) as file:
+        saved = json.load(file)
+    before = saved["results"]
+    print(f"p50 change against {path} (negative is faster):")
+    if any(saved.get(key) != value for key, value in settings.items()):
+        print(f"  note: the baseline used different data ({saved.get('users')} users x {saved.get('cycles')} cycles, seed {saved.get('seed')})")
+    for name, figures in results.items():
+        if name in before:
+            change = (figures["p50_ms"] - before[name]["p50_ms"]) / before[name]["p50_ms"] * 100
+            print(f"  {name:<24} {before[name]['p50_ms']:8.3f} -> {figures['p50_ms']:8.3f} ms  {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    login = commands.add_parser("login", help="login throughput against password hash cost")
+    login.add_argument("--costs", type=int, nargs="+", default=[2 ** 12, 2 ** 13, 2 ** 14, 2 ** 15], help="scrypt N values to try")
+    login.add_argument("--users", type=int, default=20, help="number of registered users")
+    login.add_argument("--logins", type=int, default=100, help="number of logins per cost")
+
+    date_parsing = commands.add_parser("dates", help="date parsing speed against strptime")
+    date_parsing.add_argument("--count", type=int, default=200000, help="number of date strings to parse")
+    date_parsing.add_argument("--distinct", type=int, default=3650, help="number of different dates among them")
+
+    startup = commands.add_parser("startup", help="import time before the login window appears")
+    startup.add_argument("--runs", type=int, default=10, help="number of fresh interpreters to time")
+    startup.add_argument("--target", type=float, default=STARTUP_TARGET_MS, help="budget in milliseconds")
+    startup.add_argument("--check", action="store_true", help="exit with status 1 if the budget is exceeded")
+
+    core = commands.add_parser("core", help="user store, add_cycle, calendar and prediction on synthetic users")
+    core.add_argument("--users", type=int, default=50, help="number of synthetic users")
+    core.add_argument("--cycles", type=int, default=24, help="cycles per user")
+    core.add_argument("--seed", type=int, default=0, help="seed for the synthetic data")
+    core.add_argument("--save", help="write the results to this JSON file")
+    core.add_argument("--baseline", help="compare against results saved earlier with --save")
+
+    args = parser.parse_args()
+    instrumentation.start_from_environment()
+    if args.command == "login":
+        bench_login(args.costs, args.users, args.logins)
+    elif args.command == "dates":
+        bench_dates(args.count, args.distinct)
+    elif args.command == "startup":
+        bench_startup(args.runs, args.target, args.check)
+    elif args.command == "core":
+        bench_core(args.users, args.cycles, args.seed, args.save, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
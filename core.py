@@ -0,0 +1,112 @@
+from datetime import date
+
+from cycle_array import FLOWS
+from cycle_store import DATA_DIR, CycleStore
+from dates import parse_date
+from instrumentation import timed
+from passwords import authenticate, hash_password
+from prediction_cache import prediction_cache
+from user_store import get_user_store
+
+# How many periods ahead predict_next_period forecasts
+FORECAST_PERIODS = 3
+
+
+# Function to check a login without any user interface
+@timed("core.login_user")
+def login_user(username, password, store=None):
+    """Return True if the username and password are correct."""
+    return authenticate(store or get_user_store(), username, password)
+
+
+# Function to create a new account without any user interface
+@timed("core.register_user")
+def register_user(username, password, store=None):
+    """Create an account. Returns False if the username is already taken."""
+    if not username or not password:
+        raise ValueError("Please enter both a username and password.")
+    return (store or get_user_store()).add_user(username, hash_password(password))
+
+
+# Function to turn the text typed for a cycle into dates
+def parse_cycle_dates(start_date, end_date):
+    """Return the start and end dates, raising ValueError if either is not YYYY-MM-DD."""
+    try:
+        start = parse_date(start_date)
+        end = parse_date(end_date)
+    except (ValueError, TypeError):
+        raise ValueError("Please enter the date in the format YYYY-MM-DD.") from None
+    return start, end
+
+
+# Function to check everything about a cycle typed as text
+def validate_cycle(start_date, end_date, flow):
+    """Return (start, end, flow) for a valid cycle, raising ValueError with a message otherwise."""
+    start, end = parse_cycle_dates(start_date, end_date)
+    if end < start:
+        raise ValueError("The end date cannot be before the start date.")
+    if flow not in FLOWS:
+        raise ValueError(f"Flow must be one of: {', '.join(FLOWS)}.")
+    return start, end, flow
+
+
+# Class holding the cycle logic for one user, shared by the GUI and the service
+class MenstrualTracker:
+    @timed("core.load_tracker")
+    def __init__(self, username, data_dir=DATA_DIR, autoflush=True, cache=prediction_cache):
+        """Load the saved cycles of a user (see CycleStore for autoflush)."""
+        self.username = username
+        self.store = CycleStore(username, data_dir, autoflush)
+        self.cache = cache  # Predictions are worked out once per change to the cycles
+
+    @timed("core.add_cycle")
+    def add_cycle(self, start_date, end_date, flow):
+        """Validate and save a cycle typed as text. Returns the saved cycle."""
+        start, end, flow = validate_cycle(start_date, end_date, flow)
+        self.store.add(start, end, flow)
+        self._cycles_changed()
+        return {"start": start, "end": end, "flow": flow}
+
+    def update_cycle(self, cycle, start_date, end_date, flow):
+        """Replace a saved cycle (one of the dicts from cycles()) with dates typed as text. Returns the new cycle."""
+        start, end, flow = validate_cycle(start_date, end_date, flow)
+        self.store.update(cycle, start, end, flow)
+        self._cycles_changed()
+        return {"start": start, "end": end, "flow": flow}
+
+    def remove_cycle(self, cycle):
+        """Delete a saved cycle (one of the dicts from cycles())."""
+        self.store.remove(cycle)
+        self._cycles_changed()
+
+    def close(self):
+        """Write any pending statistics and close the user's files."""
+        self.store.close()
+
+    def cycles(self, range_start=None, range_end=None):
+        """Return all cycles, or only those overlapping range_start..range_end."""
+        if range_start is None and range_end is None:
+            return list(self.store.cycles)
+        return self.store.overlapping(range_start or date.min, range_end or date.max)
+
+    @timed("core.predict_next_period")
+    def predict_next_period(self, periods=FORECAST_PERIODS):
+        """Return the prediction dict for the next period, or None with fewer than two cycles.
+
+        It also holds "forecasts" for the next few periods with their fertile
+        windows (see prediction.forecast_from_stats). Repeat calls with no
+        change to the cycles come from the cache.
+        """
+        if self.cache is None:
+            return self._forecast(periods)
+        # The log path is unique per user and data folder; the version changes with every edit
+        return self.cache.get(self.store.path, self.store.version, lambda: self._forecast(periods), variant=periods)
+
+    def _forecast(self, periods):
+        from prediction import forecast_from_stats  # Loads NumPy, so only once a prediction is asked for
+
+        return forecast_from_stats(self.store.stats, self.store.typical_period_days(), periods)
+
+    def _cycles_changed(self):
+        if self.cache is not None:
+            self.cache.invalidate(self.store.path)
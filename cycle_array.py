@@ -0,0 +1,138 @@
+import mmap
+import struct
+import sys
+from array import array
+from datetime import date
+
+# Flow types a cycle can be logged with, from lightest to heaviest; stored as their index
+FLOWS = ("light", "medium", "heavy")
+
+# File layout: header, then the start column, the end column and the flow column
+MAGIC = b"CYCA"
+VERSION = 1
+HEADER = struct.Struct("<4sBBxxQQ")  # magic, version, byte order (1 = little), count, extra (caller's own value)
+LITTLE_ENDIAN = 1 if sys.byteorder == "little" else 0
+
+
+def _column_bytes(column):
+    """Return the raw bytes of an array or memoryview, without copying unless it is a stepped view."""
+    view = memoryview(column)
+    return view.cast("B") if view.c_contiguous else view.tobytes()
+
+
+def _copy_column(typecode, column):
+    """Copy an array or memoryview (stepped slices too) into a new array with one bulk copy."""
+    copied = array(typecode)
+    copied.frombytes(_column_bytes(column))
+    return copied
+
+
+# Class to hold many cycles in three compact columns instead of one dict per cycle
+class CycleArray:
+    """Cycles stored as day ordinals (int32) and flow codes (uint8), about 9 bytes each.
+
+    Indexing and iterating give the usual {"start", "end", "flow"} dicts, so
+    code written for a list of cycle dicts keeps working. Slices are views
+    that share memory with the original; views and arrays loaded with
+    load() are read-only, and while a view (or to_numpy() result) is alive
+    the original cannot grow or shrink.
+    """
+
+    def __init__(self, starts=None, ends=None, flows=None):
+        """Create an empty array, or wrap existing columns (arrays or memoryviews)."""
+        self.starts = starts if starts is not None else array("i")  # date.toordinal() of each start
+        self.ends = ends if ends is not None else array("i")
+        self.flows = flows if flows is not None else array("B")  # Index into FLOWS
+        self._mmap = None  # Set when the columns point into a memory-mapped file
+
+    @classmethod
+    def from_cycles(cls, cycles):
+        """Build an array from an iterable of cycle dicts."""
+        result = cls()
+        for cycle in cycles:
+            result.append(cycle)
+        return result
+
+    def append(self, cycle):
+        """Add a cycle dict at the end."""
+        self.insert(len(self), cycle)
+
+    def insert(self, index, cycle):
+        """Add a cycle dict before position index."""
+        # Everything is converted first, so a bad cycle leaves the columns untouched
+        start, end, flow = cycle["start"].toordinal(), cycle["end"].toordinal(), FLOWS.index(cycle["flow"])
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.flows.insert(index, flow)
+
+    def __delitem__(self, index):
+        del self.starts[index]
+        del self.ends[index]
+        del self.flows[index]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # memoryview slices share the data instead of copying it
+            return CycleArray(memoryview(self.starts)[index], memoryview(self.ends)[index], memoryview(self.flows)[index])
+        return {
+            "start": date.fromordinal(self.starts[index]),
+            "end": date.fromordinal(self.ends[index]),
+            "flow": FLOWS[self.flows[index]],
+        }
+
+    def __iter__(self):
+        for start, end, flow in zip(self.starts, self.ends, self.flows):
+            yield {"start": date.fromordinal(start), "end": date.fromordinal(end), "flow": FLOWS[flow]}
+
+    def __eq__(self, other):
+        if isinstance(other, CycleArray):
+            return (self.starts.tolist() == other.starts.tolist() and self.ends.tolist() == other.ends.tolist()
+                    and self.flows.tolist() == other.flows.tolist())
+        return list(self) == list(other)
+
+    def to_numpy(self):
+        """Return (starts, ends, flows) as NumPy arrays that share memory with this array."""
+        import numpy as np
+
+        # asarray follows the buffer's strides, so stepped slices work too
+        return (np.asarray(memoryview(self.starts)), np.asarray(memoryview(self.ends)),
+                np.asarray(memoryview(self.flows)))
+
+    def save(self, path, extra=0):
+        """Write the columns to a binary file; extra is a number stored in the header for the caller."""
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, LITTLE_ENDIAN, len(self), extra))
+            for column in (self.starts, self.ends, self.flows):
+                file.write(_column_bytes(column))
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a file written by save(). Returns (read-only CycleArray, extra)."""
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if file.seek(0, 2) else None
+        if mapped is None or len(mapped) < HEADER.size:
+            raise ValueError(f"{path} is not a cycle array file.")
+        magic, version, byte_order, count, extra = HEADER.unpack_from(mapped)
+        if magic != MAGIC or version != VERSION or byte_order != LITTLE_ENDIAN:
+            raise ValueError(f"{path} is not a cycle array file for this machine.")
+        if len(mapped) != HEADER.size + count * 9:
+            raise ValueError(f"{path} is truncated.")
+
+        # The columns are read straight from the mapped file, nothing is parsed or copied
+        view = memoryview(mapped)
+        ints_end = HEADER.size + count * 8
+        result = cls(view[HEADER.size:HEADER.size + count * 4].cast("i"),
+                     view[HEADER.size + count * 4:ints_end].cast("i"),
+                     view[ints_end:ints_end + count])
+        result._mmap = mapped
+        return result, extra
+
+    def copy(self):
+        """Return an independent, writable copy (for example of a view or a loaded file)."""
+        return CycleArray(_copy_column("i", self.starts), _copy_column("i", self.ends), _copy_column("B", self.flows))
+
+    def __repr__(self):
+        return f"CycleArray({len(self)} cycles)"
@@ -0,0 +1,205 @@
+"""Bulk import and export of cycle history as CSV or JSON Lines.
+
+Files are read and written one row at a time, so memory use does not grow
+with the file size. Each row has "start", "end" and "flow" columns, plus an
+optional "username" column for files holding many users. Cycles that are
+already stored (same start, end and flow) are skipped, so an import that
+stopped part way can simply be run again. Examples:
+    python cycle_io.py import history.csv --user smriti --errors rejected.csv
+    python cycle_io.py import everyone.jsonl
+    python cycle_io.py export backup.jsonl --all-users
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+
+from core import validate_cycle
+from cycle_store import DATA_DIR, read_log, shard_path
+from sessions import SessionManager
+from user_store import get_user_store
+
+FIELDS = ("username", "start", "end", "flow")
+
+# Rows validated and saved together; each user's rows in a batch are one write
+BATCH_SIZE = 10000
+
+# Users whose cycle data stays open between batches when importing for many users
+OPEN_STORES = 64
+
+
+def file_format(path, fmt=None):
+    """Return "csv" or "jsonl", from fmt if given or else from the file extension."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt == "json":
+        fmt = "jsonl"
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown file format: {fmt!r} (use csv or jsonl)")
+    return fmt
+
+
+def iter_csv(file):
+    """Yield (line number, row dict) for each row of a CSV file with a header."""
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_jsonl(file):
+    """Yield (line number, row dict) for each non-blank line of a JSON Lines file."""
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = {"_error": "The line is not valid JSON.", "_raw": line.rstrip("\n")}
+        if not isinstance(row, dict):
+            row = {"_error": "Each line must be a JSON object.", "_raw": line.rstrip("\n")}
+        yield line_number, row
+
+
+def validate_batch(rows, username=None):
+    """Split (line number, row) pairs into accepted and rejected lists.
+
+    Accepted items are (username, start, end, flow); rejected items are
+    (line number, error message, row). The same rules as the Add Cycle
+    button apply. username is used for rows without a "username" column.
+    """
+    accepted, rejected = [], []
+    for line_number, row in rows:
+        if "_error" in row:
+            rejected.append((line_number, row["_error"], row))
+            continue
+        owner = row.get("username") or username
+        if not owner:
+            rejected.append((line_number, "The row has no username.", row))
+            continue
+        try:
+            start, end, flow = validate_cycle(str(row.get("start") or ""), str(row.get("end") or ""), row.get("flow") or "light")
+        except ValueError as error:
+            rejected.append((line_number, str(error), row))
+            continue
+        accepted.append((owner, start, end, flow))
+    return accepted, rejected
+
+
+def import_cycles(path, username=None, fmt=None, error_report=None, batch_size=BATCH_SIZE, data_dir=DATA_DIR,
+                  skip_existing=True):
+    """Import cycles from a CSV or JSON Lines file.
+
+    Rejected rows are written to error_report (a CSV file) if given. With
+    skip_existing, a row matching a cycle the user already has (including
+    one imported earlier in the same file) is skipped instead of added.
+    Returns a dict with the number of rows read, imported, skipped and rejected.
+    """
+    fmt = file_format(path, fmt)
+    summary = {"rows": 0, "imported": 0, "skipped": 0, "rejected": 0}
+    sessions = SessionManager(OPEN_STORES, data_dir)  # Recently used users stay open between batches
+
+    report_file = open(error_report, "w", newline="", encoding="utf-8") if error_report else None
+    try:
+        report = csv.writer(report_file) if report_file else None
+        if report:
+            report.writerow(["line", "error", "row"])
+
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            rows = iter_csv(file) if fmt == "csv" else iter_jsonl(file)
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                accepted, rejected = validate_batch(batch, username)
+
+                # Group the batch by user and save each group with a single append
+                by_user = {}
+                for owner, start, end, flow in accepted:
+                    by_user.setdefault(owner, []).append((start, end, flow))
+                imported = 0
+                for owner, cycles in by_user.items():
+                    with sessions.tracker(owner) as tracker:
+                        if skip_existing:
+                            cycles = _new_cycles(tracker.store, cycles)
+                        tracker.store.add_many(cycles)
+                    imported += len(cycles)
+
+                if report:
+                    for line_number, message, row in rejected:
+                        report.writerow([line_number, message, row.get("_raw") or json.dumps(row)])
+                summary["rows"] += len(batch)
+                summary["imported"] += imported
+                summary["skipped"] += len(accepted) - imported
+                summary["rejected"] += len(rejected)
+    finally:
+        sessions.close()  # Write the statistics of every user touched
+        if report_file:
+            report_file.close()
+    return summary
+
+
+def _new_cycles(store, cycles):
+    """Return the (start, end, flow) cycles that are not in the store yet, each once."""
+    seen = set()
+    new = []
+    for start, end, flow in cycles:
+        if (start, end, flow) in seen or {"start": start, "end": end, "flow": flow} in store:
+            continue
+        seen.add((start, end, flow))
+        new.append((start, end, flow))
+    return new
+
+
+def export_cycles(path, usernames, fmt=None, data_dir=DATA_DIR):
+    """Write the cycles of the given users to a CSV or JSON Lines file. Returns the number of rows."""
+    fmt = file_format(path, fmt)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file) if fmt == "csv" else None
+        if writer:
+            writer.writerow(FIELDS)
+        for username in usernames:
+            # One user's history is read at a time, without changing any file (the service may be writing to it)
+            for cycle in read_log(shard_path(username, data_dir))[0]:
+                row = (username, cycle["start"].isoformat(), cycle["end"].isoformat(), cycle["flow"])
+                if writer:
+                    writer.writerow(row)
+                else:
+                    file.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+                count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="import cycles from a file")
+    importer.add_argument("path", help="CSV or JSON Lines file")
+    importer.add_argument("--user", help="username for rows without a username column")
+    importer.add_argument("--format", choices=("csv", "jsonl"), help="file format (default: from the extension)")
+    importer.add_argument("--errors", help="write rejected rows to this CSV file")
+    importer.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows validated and saved together")
+    importer.add_argument("--allow-duplicates", action="store_true", help="add rows even if the user already has that cycle")
+
+    exporter = commands.add_parser("export", help="export cycles to a file")
+    exporter.add_argument("path", help="CSV or JSON Lines file to write")
+    exporter.add_argument("--user", action="append", default=[], help="user to export (can be repeated)")
+    exporter.add_argument("--all-users", action="store_true", help="export every registered user")
+    exporter.add_argument("--format", choices=("csv", "jsonl"), help="file format (default: from the extension)")
+
+    args = parser.parse_args()
+    if args.command == "import":
+        summary = import_cycles(args.path, args.user, args.format, args.errors, args.batch_size,
+                                skip_existing=not args.allow_duplicates)
+        print(f"Read {summary['rows']} rows: {summary['imported']} imported, {summary['skipped']} already stored, "
+              f"{summary['rejected']} rejected.")
+    else:
+        usernames = get_user_store().usernames() if args.all_users else args.user
+        if not args.all_users and not usernames:
+            parser.error("give at least one --user or --all-users")
+        print(f"Exported {export_cycles(args.path, usernames, args.format)} cycles.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import math
+from collections import deque
+from datetime import date
+
+# Number of most recent gaps kept for the rolling average
+WINDOW = 6
+
+
+# Class to keep a user's gap statistics up to date one change at a time
+class RunningStats:
+    def __init__(self, window=WINDOW):
+        """Start with no gaps recorded."""
+        self.count = 0  # Number of gaps between consecutive periods
+        self.total = 0  # Sum of all gaps in days
+        self.mean = 0.0  # Welford running mean
+        self.m2 = 0.0  # Welford sum of squared differences from the mean
+        self.last_end = None  # End date of the most recent period
+        self.recent = deque(maxlen=window)  # The last few gaps, oldest first
+
+    def add_gap(self, gap):
+        """Include one gap (days from the end of a period to the start of the next)."""
+        self.count += 1
+        self.total += gap
+        delta = gap - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (gap - self.mean)
+
+    def remove_gap(self, gap):
+        """Take one previously added gap back out of the statistics."""
+        self.count -= 1
+        self.total -= gap
+        if self.count == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        delta = gap - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(self.m2 - delta * (gap - self.mean), 0.0)  # Guard against rounding below zero
+
+    @property
+    def variance(self):
+        """Population variance of the gaps (0 when there are none)."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def recent_mean(self):
+        """Average of the gaps in the rolling window, or None if it is empty."""
+        return sum(self.recent) / len(self.recent) if self.recent else None
+
+    def to_dict(self):
+        """Return the statistics as plain JSON-friendly values."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "m2": self.m2,
+            "last_end": self.last_end.isoformat() if self.last_end else None,
+            "recent": list(self.recent),
+            "window": self.recent.maxlen,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild statistics saved with to_dict()."""
+        stats = cls(window=data.get("window", WINDOW))
+        stats.count = data["count"]
+        stats.total = data["total"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        stats.last_end = date.fromisoformat(data["last_end"]) if data["last_end"] else None
+        stats.recent.extend(data["recent"])
+        return stats
@@ -0,0 +1,364 @@
+import bisect
+import hashlib
+import json
+import os
+from cycle_array import FLOWS, CycleArray
+from cycle_stats import RunningStats
+from dates import parse_date
+from instrumentation import timed
+
+# Folder where all cycle data is kept (one log file per user)
+DATA_DIR = "data"
+
+
+# Function to work out where a user's cycle log lives on disk
+def shard_path(username, data_dir=DATA_DIR):
+    """Return the log file path for a user, keyed by a hash of the username."""
+    # Hashing keeps odd usernames (slashes, spaces, ...) out of the file system
+    # and the two-character folder stops one directory growing too large
+    digest = hashlib.sha256(username.encode("utf-8")).hexdigest()
+    return os.path.join(data_dir, "cycles", digest[:2], digest + ".log")
+
+
+# How each kind of log record changes the number of copies of its cycle
+OP_CHANGES = {"add": 1, "remove": -1}
+
+
+# Function to check one cycle written in the log
+def _record_key(record):
+    """Return (start, end, flow) of a logged cycle, raising ValueError, KeyError or TypeError if it is unusable."""
+    key = (record["start"], record["end"], record["flow"])
+    parse_date(key[0])
+    parse_date(key[1])
+    if key[2] not in FLOWS:
+        raise ValueError(key[2])
+    return key
+
+
+# Function to read a cycle log without changing it
+def read_log(path):
+    """Return (cycles sorted by start, bytes of complete lines, file size, bad lines) for a log file.
+
+    Only an unterminated last line counts as a torn write. A complete line
+    that cannot be read is skipped (and counted in bad lines), so the
+    records after it are still loaded.
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return [], 0, 0, 0  # New user, nothing logged yet
+
+    complete = 0
+    bad_lines = 0
+    counts = {}  # (start, end, flow) -> how many times that cycle is currently logged
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break  # The app stopped part way through an append
+        complete += len(line)
+        try:
+            record = json.loads(line)
+            op = record.get("op")
+            if op == "replace":
+                # An edit is a single line, so a crash can never leave it half applied
+                changes = ((_record_key(record["old"]), -1), (_record_key(record["new"]), 1))
+            else:
+                changes = ((_record_key(record), OP_CHANGES.get(op, 0)),)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            bad_lines += 1
+            continue
+        for key, change in changes:
+            counts[key] = counts.get(key, 0) + change
+
+    cycles = []
+    for (start, end, flow), count in counts.items():
+        for _ in range(count):
+            cycles.append({"start": parse_date(start), "end": parse_date(end), "flow": flow})
+
+    # Sort once after loading instead of inserting one cycle at a time
+    cycles.sort(key=lambda cycle: (cycle["start"], cycle["end"]))
+    return cycles, complete, len(data), bad_lines
+
+
+# Class to keep one user's cycles on disk and in a sorted in-memory index
+class CycleStore:
+    def __init__(self, username, data_dir=DATA_DIR, autoflush=True):
+        """Open (or create) the cycle log for a user and load it into memory.
+
+        With autoflush=False the statistics file is only written by flush() or
+        close(); the log itself is always written straight away.
+        """
+        self.username = username
+        self.autoflush = autoflush
+        self.path = shard_path(username, data_dir)
+        self.stats_path = self.path[:-len(".log")] + ".stats.json"  # Running statistics saved next to the log
+        self.snapshot_path = self.path[:-len(".log")] + ".cyc"  # Compact copy of the cycles, written on close
+
+        self.cycles = CycleArray()  # Cycles sorted by start date; cycles.starts is used for bisect
+        self._max_length = 0  # Longest period in days, used to bound range queries
+        self._log_size = 0  # Bytes of complete lines in the log
+        self.bad_lines = 0  # Complete lines of the log that could not be read and were skipped
+        self._snapshot_size = 0  # Log size the snapshot file matches
+        self.stats = RunningStats()  # Gap statistics, updated with every change
+        self._stats_dirty = False  # True when self.stats has not been written to disk yet
+        self._file = None  # Log file kept open for appending
+
+        self.load()
+
+    @timed("store.load")
+    def load(self):
+        """Bulk load every cycle, from the snapshot if it is up to date, else from the log."""
+        self._max_length = 0
+        self.stats = RunningStats()
+
+        if not self._load_snapshot():
+            cycles, self._log_size, file_size, self.bad_lines = read_log(self.path)
+            if not file_size:
+                self.cycles = CycleArray()
+                return  # New user, nothing logged yet
+            if self._log_size < file_size:
+                # Cut off the torn last line so new appends start on a clean line
+                with open(self.path, "r+b") as file:
+                    file.truncate(self._log_size)
+            self.cycles = CycleArray.from_cycles(cycles)
+
+        if self.cycles:
+            self._max_length = max(end - start for start, end in zip(self.cycles.starts, self.cycles.ends))
+        self._load_stats()
+
+    def add(self, start, end, flow):
+        """Append a single cycle to the log and the index."""
+        self.add_many([(start, end, flow)])
+
+    def add_many(self, cycles):
+        """Append several (start, end, flow) cycles with a single write to disk."""
+        new_cycles = [self._make_cycle(start, end, flow) for start, end, flow in cycles]
+        if not new_cycles:
+            return
+
+        self._append_records([self._to_record(cycle) for cycle in new_cycles])
+
+        for cycle in new_cycles:
+            self._insert(cycle)
+        self._changed()
+
+    def remove(self, cycle):
+        """Delete a cycle (one of the dicts in self.cycles) from the log and the index."""
+        index = self._find(cycle)
+        self._append_records([self._to_record(cycle, "remove")])
+        self._remove_at(index)
+        self._changed()
+
+    def update(self, cycle, start, end, flow):
+        """Replace a cycle with new dates and flow."""
+        index = self._find(cycle)
+        new_cycle = self._make_cycle(start, end, flow)
+        # One log line holds both the old and the new cycle, so an edit is never half applied
+        self._append_records([{"op": "replace", "old": self._to_fields(cycle), "new": self._to_fields(new_cycle)}])
+        self._remove_at(index)
+        self._insert(new_cycle)
+        self._changed()
+
+    def flush(self):
+        """Write the statistics to disk if they have changed since the last write."""
+        if self._stats_dirty:
+            self._save_stats()
+            self._stats_dirty = False
+
+    def close(self):
+        """Flush the statistics and snapshot and close the log file. The store can still be used afterwards."""
+        self.flush()
+        if self._log_size and self._snapshot_size != self._log_size:
+            self._save_snapshot()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def version(self):
+        """A number that changes whenever the cycles change, even across reloads (it is the log size)."""
+        return self._log_size
+
+    def typical_period_days(self):
+        """Return the average days from start to end over the newest cycles (0 with no cycles)."""
+        starts, ends = self.cycles.starts, self.cycles.ends
+        first = max(0, len(starts) - self.stats.recent.maxlen)  # Same window as the recent gaps
+        lengths = [ends[i] - starts[i] for i in range(first, len(starts))]
+        return round(sum(lengths) / len(lengths)) if lengths else 0
+
+    def overlapping(self, range_start, range_end):
+        """Return the cycles that share at least one day with range_start..range_end."""
+        # A cycle can only overlap if it starts no later than range_end and no
+        # earlier than the longest period before range_start
+        starts, ends = self.cycles.starts, self.cycles.ends
+        low = bisect.bisect_left(starts, range_start.toordinal() - self._max_length)
+        high = bisect.bisect_right(starts, range_end.toordinal())
+        first_day = range_start.toordinal()
+        return [self.cycles[i] for i in range(low, high) if ends[i] >= first_day]
+
+    def __len__(self):
+        return len(self.cycles)
+
+    def __contains__(self, cycle):
+        """Return True if a cycle with the same start, end and flow is stored."""
+        try:
+            self._find(cycle)
+        except ValueError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.cycles)
+
+    def _insert(self, cycle):
+        """Put a cycle into the sorted index (O(1) when it is the newest cycle)."""
+        start, end = cycle["start"].toordinal(), cycle["end"].toordinal()
+        starts = self.cycles.starts
+        index = bisect.bisect_right(starts, start)
+        # Cycles starting on the same day are ordered by end date, as in load()
+        while index > 0 and starts[index - 1] == start and self.cycles.ends[index - 1] > end:
+            index -= 1
+        previous = self.cycles[index - 1] if index > 0 else None
+        following = self.cycles[index] if index < len(self.cycles) else None
+
+        # The new cycle splits the gap between its neighbours into two
+        if previous and following:
+            self.stats.remove_gap((following["start"] - previous["end"]).days)
+        if previous:
+            self.stats.add_gap((cycle["start"] - previous["end"]).days)
+        if following:
+            self.stats.add_gap((following["start"] - cycle["end"]).days)
+
+        self.cycles.insert(index, cycle)
+        self._max_length = max(self._max_length, (cycle["end"] - cycle["start"]).days)
+
+        if following is None and previous:
+            self.stats.recent.append((cycle["start"] - previous["end"]).days)  # Newest cycle: just extend the window
+        else:
+            self._refresh_recent(index)
+        self.stats.last_end = self.cycles[-1]["end"]
+
+    def _remove_at(self, index):
+        """Take the cycle at index out of the sorted index."""
+        cycle = self.cycles[index]
+        previous = self.cycles[index - 1] if index > 0 else None
+        following = self.cycles[index + 1] if index + 1 < len(self.cycles) else None
+
+        # The two gaps around the cycle merge into one
+        if previous:
+            self.stats.remove_gap((cycle["start"] - previous["end"]).days)
+        if following:
+            self.stats.remove_gap((following["start"] - cycle["end"]).days)
+        if previous and following:
+            self.stats.add_gap((following["start"] - previous["end"]).days)
+
+        # _max_length is left alone: it only needs to be an upper bound
+        del self.cycles[index]
+
+        self._refresh_recent(index)
+        self.stats.last_end = self.cycles[-1]["end"] if self.cycles else None
+
+    def _refresh_recent(self, index):
+        """Rebuild the rolling window if a change at index touched one of its gaps."""
+        if index < len(self.cycles) - self.stats.recent.maxlen - 1:
+            return  # The change is older than every gap in the window
+        self._rebuild_recent()
+
+    def _rebuild_recent(self):
+        """Fill the rolling window from the newest cycles."""
+        starts, ends = self.cycles.starts, self.cycles.ends
+        first = max(1, len(starts) - self.stats.recent.maxlen)
+        self.stats.recent.clear()
+        self.stats.recent.extend(starts[i] - ends[i - 1] for i in range(first, len(starts)))
+
+    def _find(self, cycle):
+        """Return the position of a cycle in self.cycles, looking only at cycles with the same start."""
+        starts = self.cycles.starts
+        index = bisect.bisect_left(starts, cycle["start"].toordinal())
+        while index < len(starts) and starts[index] == cycle["start"].toordinal():
+            if self.cycles[index] == cycle:
+                return index
+            index += 1
+        raise ValueError("That cycle is not in the store.")
+
+    def _load_stats(self):
+        """Use the saved statistics if they match the log, otherwise rebuild them once."""
+        try:
+            with open(self.stats_path, "r") as file:
+                saved = json.load(file)
+            if saved["log_size"] == self._log_size:
+                self.stats = RunningStats.from_dict(saved["stats"])
+                return
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+        self.stats = RunningStats()
+        starts, ends = self.cycles.starts, self.cycles.ends
+        for i in range(1, len(starts)):
+            self.stats.add_gap(starts[i] - ends[i - 1])
+        self.stats.last_end = self.cycles[-1]["end"] if self.cycles else None
+        self._rebuild_recent()
+        self._changed()
+
+    def _load_snapshot(self):
+        """Use the snapshot file if it was written for the log as it is now. Returns True if it was used."""
+        try:
+            snapshot, log_size = CycleArray.load(self.snapshot_path)
+            if log_size != os.path.getsize(self.path):
+                return False  # The log has changed since the snapshot was written
+        except (FileNotFoundError, ValueError):
+            return False
+        # One bulk copy out of the mapped file gives an array that can be changed
+        self.cycles = snapshot.copy()
+        self._log_size = self._snapshot_size = log_size
+        return True
+
+    def _save_snapshot(self):
+        """Write the cycles as a compact binary file, tagged with the log size they describe."""
+        temp_path = self.snapshot_path + ".tmp"
+        self.cycles.save(temp_path, extra=self._log_size)
+        os.replace(temp_path, self.snapshot_path)
+        self._snapshot_size = self._log_size
+
+    def _changed(self):
+        """Note that the statistics changed, writing them now unless flushing is deferred."""
+        self._stats_dirty = True
+        if self.autoflush:
+            self.flush()
+
+    def _save_stats(self):
+        """Write the statistics next to the log, tagged with the log size they describe."""
+        os.makedirs(os.path.dirname(self.stats_path), exist_ok=True)
+        temp_path = self.stats_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"log_size": self._log_size, "stats": self.stats.to_dict()}, file)
+        os.replace(temp_path, self.stats_path)  # Readers never see a half-written file
+
+    @timed("store.append")
+    def _append_records(self, records):
+        """Write records to the end of the log and make sure they reach the disk."""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        payload = "".join(json.dumps(record) + "\n" for record in records)
+        self._file.write(payload)
+        self._file.flush()
+        os.fsync(self._file.fileno())  # Survive a crash or power cut right after saving
+        self._log_size += len(payload.encode("utf-8"))
+
+    @staticmethod
+    def _make_cycle(start, end, flow):
+        if end < start:
+            raise ValueError("The end date cannot be before the start date.")
+        if flow not in FLOWS:
+            raise ValueError(f"Flow must be one of: {', '.join(FLOWS)}.")
+        return {"start": start, "end": end, "flow": flow}
+
+    @staticmethod
+    def _to_record(cycle, op="add"):
+        return {"op": op, **CycleStore._to_fields(cycle)}
+
+    @staticmethod
+    def _to_fields(cycle):
+        return {"start": cycle["start"].isoformat(), "end": cycle["end"].isoformat(), "flow": cycle["flow"]}
+
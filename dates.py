@@ -0,0 +1,30 @@
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+# Function to turn "YYYY-MM-DD" text into a date, much faster than strptime
+@lru_cache(maxsize=4096)  # Imports and the calendar parse the same strings again and again
+def parse_date(text):
+    """Return the date for text in the %Y-%m-%d format, raising ValueError otherwise."""
+    if len(text) == 10 and text[4] == "-" and text[7] == "-":
+        try:
+            return date.fromisoformat(text)  # Fast path for the usual zero-padded form
+        except ValueError:
+            pass
+    # Anything else (such as "2024-1-5", which strptime accepts) gets the exact old rules
+    return datetime.strptime(text, DATE_FORMAT).date()
+
+
+# Function to parse a whole column of date strings at once
+def parse_ordinals(texts):
+    """Return an array('i') of day ordinals for the strings, with 0 for any that are not valid dates."""
+    ordinals = array("i")
+    for text in texts:
+        try:
+            ordinals.append(parse_date(text).toordinal())
+        except (ValueError, TypeError):
+            ordinals.append(0)  # Real dates start at ordinal 1
+    return ordinals
@@ -0,0 +1,115 @@
+"""Optional timing counters and profiling for the tracker's hot paths.
+
+Both are off unless switched on with environment variables:
+    TRACKER_TIMINGS=1 python main.py         (call counts and times, printed on exit)
+    TRACKER_PROFILE=run.prof python main.py  (cProfile of the main thread, saved on exit)
+A saved profile can be read with: python -m pstats run.prof
+"""
+import atexit
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+# Environment variables that switch the instrumentation on
+TIMINGS_ENV = "TRACKER_TIMINGS"
+PROFILE_ENV = "TRACKER_PROFILE"
+
+# Read once at import time: functions decorated while this is False are left untouched
+enabled = os.environ.get(TIMINGS_ENV, "") not in ("", "0")
+
+_counters = {}  # name -> [calls, total seconds, slowest call in seconds]
+_lock = threading.Lock()  # Counters are updated from worker threads too
+_profiler = None
+_started = False
+
+
+# Decorator to count and time calls to a hot-path function
+def timed(name):
+    """Record calls to the decorated function under name when timings are switched on.
+
+    With timings off the function is returned as it is, so it costs nothing.
+    """
+    def decorate(function):
+        if not enabled:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+# Function to add one timed call to a counter
+def record(name, seconds):
+    """Count one call of name that took the given number of seconds."""
+    with _lock:
+        counter = _counters.get(name)
+        if counter is None:
+            counter = _counters[name] = [0, 0.0, 0.0]
+        counter[0] += 1
+        counter[1] += seconds
+        counter[2] = max(counter[2], seconds)
+
+
+# Function to read the counters
+def counters():
+    """Return {name: {"calls", "total_ms", "mean_ms", "max_ms"}} for everything recorded so far."""
+    with _lock:
+        items = [(name, list(counter)) for name, counter in _counters.items()]
+    return {name: {"calls": calls, "total_ms": total * 1000, "mean_ms": total * 1000 / calls, "max_ms": slowest * 1000}
+            for name, (calls, total, slowest) in items}
+
+
+# Function to clear the counters
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        _counters.clear()
+
+
+# Function to print the counters as a table
+def report(file=None):
+    """Print the counters, slowest in total first (to stderr unless file is given)."""
+    file = file or sys.stderr
+    rows = sorted(counters().items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    if not rows:
+        return
+    print(f"{'timings':<28} {'calls':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9}", file=file)
+    for name, row in rows:
+        print(f"{name:<28} {row['calls']:>8} {row['total_ms']:>10.1f} {row['mean_ms']:>9.3f} {row['max_ms']:>9.3f}", file=file)
+
+
+# Function to switch on whatever the environment variables ask for
+def start_from_environment():
+    """Start the profiler and the exit report if their environment variables are set. Safe to call twice."""
+    global _profiler, _started
+    if _started:
+        return
+    _started = True
+
+    if enabled:
+        atexit.register(report)
+
+    profile_path = os.environ.get(PROFILE_ENV)
+    if profile_path:
+        import cProfile  # Only loaded when profiling was asked for
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        atexit.register(_save_profile, profile_path)
+
+
+def _save_profile(path):
+    """Stop the profiler and write its statistics to path."""
+    _profiler.disable()
+    _profiler.dump_stats(path)
+    print(f"Profile saved to {path} (read it with: python -m pstats {path})", file=sys.stderr)
@@ -1,24 +1,21 @@
 import tkinter as tk
 from tkinter import messagebox
-import json
-from tracker import MenstrualTrackerApp  # Importing the Menstrual Tracker app page
-
-# Function to load the users from the JSON file
-def load_users():
-    try:
-        # Try to open the "users.json" file and load the data
-        with open("users.json", "r") as file:
-            return json.load(file)  # Return the data (users) in JSON format
-    except FileNotFoundError:
-        # If the file doesn't exist, return an empty dictionary
-        return {}
-
-# Function to save a new user to the "users.json" file
-def save_user(username, password):
-    users = load_users()  # Load the current users
-    users[username] = password  # Add the new user with their password
-    with open("users.json", "w") as file:
-        json.dump(users, file)  # Save the updated users data to the file
+from background import BackgroundRunner  # Runs slow work without freezing the window
+
+
+# Account checks shared with the headless service. core (and the storage code behind it) is only
+# imported when a button is pressed, on the background thread, so the window appears sooner
+def login_user(username, password):
+    from core import login_user
+
+    return login_user(username, password)
+
+
+def register_user(username, password):
+    from core import register_user
+
+    return register_user(username, password)
+
 
 # Class to handle the login page interface
 class LoginPage:
@@ -27,6 +24,7 @@ class LoginPage:
         self.root.title("Login")  # Set the window title
         self.root.geometry("400x300")  # Set the window size (width x height)
         self.root.configure(bg="#f9c8d3")  # Set the background color to light pink
+        self.runner = BackgroundRunner(self.root)  # Shared with the tracker page after login
 
         # Create the "Username" label
         self.username_label = tk.Label(self.root, text="Username:", font=("Arial", 12), bg="#f9c8d3", fg="#9c4d7d")
@@ -57,12 +55,18 @@ class LoginPage:
         username = self.username_entry.get()  # Get the entered username
         password = self.password_entry.get()  # Get the entered password
 
-        users = load_users()  # Load the saved users from the JSON file
-        if username in users and users[username] == password:
+        # Password hashing and the database lookup run in the background so the window stays responsive
+        self.set_busy(True)
+        self.runner.submit(login_user, username, password,
+                           on_done=lambda success: self.login_finished(username, success), on_error=self.task_failed)
+
+    def login_finished(self, username, success):
+        """Called on the Tk thread once the login check has finished."""
+        self.set_busy(False)
+        if success:
             # If the username exists and the password matches
             messagebox.showinfo("Login Successful", "Welcome to the Menstrual Tracker!")  # Show success message
-            self.root.destroy()  # Close the login window
-            self.show_tracker_page()  # Open the Menstrual Tracker page
+            self.show_tracker_page(username)  # Open the Menstrual Tracker page
         else:
             # If the login fails (wrong username or password)
             messagebox.showerror("Login Failed", "Invalid username or password.")  # Show error message
@@ -73,17 +77,38 @@ class LoginPage:
         password = self.password_entry.get()  # Get the entered password
 
         if username and password:
-            # If both the username and password are provided
-            save_user(username, password)  # Save the new user to the JSON file
-            messagebox.showinfo("Registration Successful", "You can now log in with your credentials.")  # Show success message
+            # If both the username and password are provided, save the new user in the background
+            self.set_busy(True)
+            self.runner.submit(register_user, username, password, on_done=self.register_finished, on_error=self.task_failed)
         else:
             # If either username or password is missing
             messagebox.showerror("Registration Failed", "Please enter both a username and password.")  # Show error message
 
-    def show_tracker_page(self):
-        """Opens the Menstrual Tracker page after a successful login."""
-        tracker_root = tk.Tk()  # Create a new window for the Menstrual Tracker page
-        tracker_root.title("Menstrual Tracker")  # Set the title for the tracker page
-        menstrual_app = MenstrualTrackerApp(tracker_root)  # Create an instance of the MenstrualTrackerApp class
-        tracker_root.mainloop()  # Start the tkinter event loop for the tracker page
+    def register_finished(self, created):
+        """Called on the Tk thread once the new user has been saved (or turned down)."""
+        self.set_busy(False)
+        if created:
+            messagebox.showinfo("Registration Successful", "You can now log in with your credentials.")  # Show success message
+        else:
+            # Someone has already registered with this username
+            messagebox.showerror("Registration Failed", "That username is already taken.")  # Show error message
+
+    def task_failed(self, error):
+        """Show an error raised by background work."""
+        self.set_busy(False)
+        messagebox.showerror("Error", str(error))
+
+    def set_busy(self, busy):
+        """Disable the buttons while a login or registration is in progress."""
+        state = "disabled" if busy else "normal"
+        self.login_button.config(state=state)
+        self.register_button.config(state=state)
+
+    def show_tracker_page(self, username):
+        """Replaces the login page with the Menstrual Tracker page in the same window."""
+        # Imported only now: the tracker page (tkcalendar, NumPy, ...) is not needed to draw the login window
+        from tracker import MenstrualTrackerApp
 
+        for widget in self.root.winfo_children():
+            widget.destroy()  # Clear the login widgets; the window and its event loop stay
+        self.tracker_app = MenstrualTrackerApp(self.root, username, self.runner)
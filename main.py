@@ -1,8 +1,10 @@
 import tkinter as tk
 from login import LoginPage  # Import the LoginPage class from the login.py file
+from instrumentation import start_from_environment  # Optional timings and profiling, see instrumentation.py
 
 # The main function where the program starts
 def main():
+    start_from_environment()  # Does nothing unless TRACKER_TIMINGS or TRACKER_PROFILE is set
     root = tk.Tk()  # Create the main window (root) for the application
     login_page = LoginPage(root)  # Create an instance of the LoginPage class and pass the root window to it
     root.mainloop()  # Start the tkinter event loop to display the login page and handle user interactions
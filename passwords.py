@@ -0,0 +1,126 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+
+# Default scrypt cost used for new passwords. Raise SCRYPT_N to make hashing slower
+# (and guessing harder); use benchmark.py to check what login latency that costs.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+SALT_BYTES = 16
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+# Function to turn a password into a salted hash record for storing in the database
+def hash_password(password, n=None, r=None, p=None):
+    """Return a "scrypt$n$r$p$salt$hash" record for the password (default cost if not given)."""
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=_maxmem(n, r))
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(digest)}"
+
+
+# Function to check a password against a stored record
+def verify_password(record, password):
+    """Return True if the password matches the record (hashed or legacy plain text)."""
+    parts = record.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            salt, expected = base64.b64decode(parts[4]), base64.b64decode(parts[5])
+            digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=_maxmem(n, r), dklen=len(expected))
+        elif parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            iterations = int(parts[1])
+            salt, expected = base64.b64decode(parts[2]), base64.b64decode(parts[3])
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations, dklen=len(expected))
+        else:
+            # Accounts created before hashing was added store the password itself
+            expected, digest = record.encode("utf-8"), password.encode("utf-8")
+    except (ValueError, binascii.Error, OverflowError):
+        return False  # A damaged record (bad numbers, base64 or cost settings) matches no password
+    return hmac.compare_digest(digest, expected)
+
+
+# Function to tell whether a stored record should be replaced with a fresh hash
+def needs_rehash(record):
+    """Return True for plain text records and hashes made with other cost settings."""
+    return not record.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+def _maxmem(n, r):
+    # scrypt needs about 128 * n * r bytes; leave headroom above OpenSSL's 32 MiB default
+    return 2 * 128 * n * r + 1024 * 1024
+
+
+# Class to remember recently verified logins so repeat logins skip the slow hash
+class CredentialCache:
+    def __init__(self, max_size=1024):
+        """Create an empty cache holding at most max_size users."""
+        self.max_size = max_size
+        self._secret = os.urandom(32)  # Cached entries are only meaningful inside this process
+        self._entries = OrderedDict()  # username -> (stored record, keyed password digest)
+        self._lock = threading.Lock()  # The service checks logins from several worker threads
+
+    def check(self, username, record, password):
+        """Return True if this password was recently verified against this exact record."""
+        digest = self._digest(password)
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] != record:
+                return False  # Not cached, or the password has changed since
+            self._entries.move_to_end(username)
+        return hmac.compare_digest(entry[1], digest)
+
+    def remember(self, username, record, password):
+        """Store a successfully verified login, evicting the least recently used one if full."""
+        entry = (record, self._digest(password))
+        with self._lock:
+            self._entries[username] = entry
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def forget(self, username):
+        """Drop a user from the cache (for example after a password change)."""
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _digest(self, password):
+        # A keyed fast hash, so the cache never holds the password itself
+        return hmac.new(self._secret, password.encode("utf-8"), hashlib.sha256).digest()
+
+
+# Shared cache used by the login pages
+credential_cache = CredentialCache()
+
+
+# Function to check a username and password against the user store
+def authenticate(store, username, password, cache=credential_cache):
+    """Return True if the login is valid, upgrading old records to the current hash."""
+    record = store.get_password(username)
+    if record is None:
+        return False
+    if cache is not None and cache.check(username, record, password):
+        return True
+    if not verify_password(record, password):
+        return False
+
+    if needs_rehash(record):
+        # Replace plain text (or an outdated hash) now that we know the password
+        record = hash_password(password)
+        store.set_password(username, record)
+    if cache is not None:
+        cache.remember(username, record, password)
+    return True
@@ -0,0 +1,91 @@
+import bisect
+from datetime import date, timedelta
+
+from cycle_array import FLOWS  # Lightest to heaviest: overlapping days show the heaviest flow
+from instrumentation import timed
+
+# Tag put on every event this module creates
+PERIOD_TAG = "period"
+
+
+# Class to hold a set of day ranges, merging ranges that overlap or touch
+class IntervalSet:
+    def __init__(self):
+        """Start with no days covered."""
+        self._starts = []  # Day ordinals, sorted; the ranges never overlap
+        self._ends = []
+
+    def add(self, start, end):
+        """Cover the days start..end (day ordinals, both included)."""
+        # Ranges that overlap or sit right next to the new one get merged into it
+        first = bisect.bisect_left(self._ends, start - 1)
+        last = bisect.bisect_right(self._starts, end + 1)
+        if first < last:
+            start = min(start, self._starts[first])
+            end = max(end, self._ends[last - 1])
+        self._starts[first:last] = [start]
+        self._ends[first:last] = [end]
+
+    def overlapping(self, start, end):
+        """Return the (start, end) ranges that share a day with start..end."""
+        first = bisect.bisect_left(self._ends, start)
+        last = bisect.bisect_right(self._starts, end)
+        return list(zip(self._starts[first:last], self._ends[first:last]))
+
+    def __len__(self):
+        return len(self._starts)
+
+
+# Class to show logged periods on a tkcalendar Calendar one month at a time
+class PeriodCalendar:
+    def __init__(self, calendar):
+        """Attach to a Calendar widget and redraw whenever its month changes."""
+        self.calendar = calendar
+        self.ranges = {flow: IntervalSet() for flow in FLOWS}
+        self._event_ids = []  # Events currently drawn for the displayed month
+        self._shown = None  # (first day, last day) currently drawn
+
+        self.calendar.bind("<<CalendarMonthChanged>>", lambda event: self.refresh())
+
+    def add_period(self, start, end, flow):
+        """Record a period (dates) and redraw only if it is on screen."""
+        self.add_periods([(start, end, flow)])
+
+    def add_periods(self, periods):
+        """Record many (start, end, flow) periods, redrawing at most once."""
+        on_screen = False
+        first, last = self._visible_range()
+        for start, end, flow in periods:
+            self.ranges.setdefault(flow, IntervalSet()).add(start.toordinal(), end.toordinal())
+            on_screen = on_screen or (start.toordinal() <= last and end.toordinal() >= first)
+        if on_screen or self._shown is None:
+            self.refresh()
+
+    @timed("calendar.refresh")
+    def refresh(self):
+        """Replace the drawn events with those for the month being displayed."""
+        first, last = self._visible_range()
+
+        # Later (heavier) flows overwrite lighter ones, so each day gets one event
+        day_flows = {}
+        for flow in self._flow_order():
+            for start, end in self.ranges[flow].overlapping(first, last):
+                for day in range(max(start, first), min(end, last) + 1):
+                    day_flows[day] = flow
+
+        if self._event_ids:
+            self.calendar.calevent_remove(*self._event_ids)
+        self._event_ids = [self.calendar.calevent_create(date.fromordinal(day), "Period", tags=[PERIOD_TAG, flow])
+                           for day, flow in sorted(day_flows.items())]
+        self._shown = (first, last)
+
+    def _visible_range(self):
+        """Return the first and last day ordinals the calendar can show for its month."""
+        month, year = self.calendar.get_displayed_month()
+        month_start = date(year, month, 1)
+        # The grid shows six weeks, starting up to a week before the 1st
+        return (month_start - timedelta(days=7)).toordinal(), (month_start + timedelta(days=42)).toordinal()
+
+    def _flow_order(self):
+        known = [flow for flow in FLOWS if flow in self.ranges]
+        return [flow for flow in self.ranges if flow not in FLOWS] + known
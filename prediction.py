@@ -0,0 +1,189 @@
+"""Headless next-period prediction for one or many users at once.
+
+Cycles for many users are passed as flat NumPy arrays of day ordinals
+(date.toordinal()), one user after another, plus an offsets array in which
+user i owns cycles offsets[i]:offsets[i + 1]. Each user's cycles must be
+sorted by start date. A "gap" is the number of days from the end of one
+period to the start of the next, the same measure the tracker has always
+used for its average.
+"""
+import math
+from datetime import date, timedelta
+
+import numpy as np
+
+# Names of the statistics that can be used as the centre of a prediction
+METHODS = ("mean", "median", "trimmed_mean", "weighted_mean")
+
+# Fraction of gaps cut from each end of a user's sorted gaps for the trimmed mean
+TRIM_FRACTION = 0.1
+
+# Ovulation is estimated this many days before the next period starts, and the
+# fertile window runs from FERTILE_DAYS_BEFORE days before it to FERTILE_DAYS_AFTER after
+LUTEAL_DAYS = 14
+FERTILE_DAYS_BEFORE = 5
+FERTILE_DAYS_AFTER = 1
+
+
+def cycles_to_arrays(cycles_by_user):
+    """Turn a list of per-user cycle lists (dicts with date "start"/"end") into (starts, ends, offsets)."""
+    counts = [len(cycles) for cycles in cycles_by_user]
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    starts = np.fromiter((c["start"].toordinal() for cycles in cycles_by_user for c in cycles), dtype=np.int64, count=offsets[-1])
+    ends = np.fromiter((c["end"].toordinal() for cycles in cycles_by_user for c in cycles), dtype=np.int64, count=offsets[-1])
+    return starts, ends, offsets
+
+
+def gap_statistics(starts, ends, offsets, trim=TRIM_FRACTION):
+    """Return a dict of per-user gap statistics (arrays of length n_users, NaN where a user has no gaps)."""
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n_users = len(offsets) - 1
+
+    # Label every cycle with its user, then keep only gaps between cycles of the same user
+    cycle_user = np.repeat(np.arange(n_users), np.diff(offsets))
+    same_user = cycle_user[1:] == cycle_user[:-1]
+    gaps = (starts[1:] - ends[:-1])[same_user].astype(np.float64)
+    gap_user = cycle_user[1:][same_user]
+
+    count = np.bincount(gap_user, minlength=n_users)
+    has_gaps = count > 0
+    safe_count = np.maximum(count, 1)
+    gap_offsets = np.zeros(n_users + 1, dtype=np.int64)
+    np.cumsum(count, out=gap_offsets[1:])
+
+    def per_user(values):
+        # Sum values per user; NaN for users without any gaps
+        return np.where(has_gaps, np.bincount(gap_user, weights=values, minlength=n_users), np.nan)
+
+    mean = per_user(gaps) / safe_count
+    std = np.sqrt(per_user((gaps - mean[gap_user]) ** 2) / safe_count)
+
+    # Newer gaps count more: the k-th gap of a user has weight k
+    position = np.arange(len(gaps)) - gap_offsets[gap_user] + 1
+    weighted_mean = per_user(gaps * position) / np.maximum(np.bincount(gap_user, weights=position, minlength=n_users), 1)
+
+    # Sort gaps inside each user (users stay in order) for the median and trimmed mean
+    sorted_gaps = gaps[np.lexsort((gaps, gap_user))]
+    first = gap_offsets[:-1]
+    low = np.minimum(first + (safe_count - 1) // 2, max(len(gaps) - 1, 0))
+    high = np.minimum(first + safe_count // 2, max(len(gaps) - 1, 0))
+    if len(gaps):
+        median = np.where(has_gaps, (sorted_gaps[low] + sorted_gaps[high]) / 2, np.nan)
+    else:
+        median = np.full(n_users, np.nan)
+
+    cut = np.floor(count * trim).astype(np.int64)
+    rank = np.arange(len(gaps)) - gap_offsets[gap_user]
+    kept = (rank >= cut[gap_user]) & (rank < (count - cut)[gap_user])
+    kept_count = np.maximum(count - 2 * cut, 1)
+    trimmed_mean = per_user(np.where(kept, sorted_gaps, 0.0)) / kept_count
+
+    return {
+        "count": count,
+        "mean": mean,
+        "median": median,
+        "trimmed_mean": trimmed_mean,
+        "weighted_mean": weighted_mean,
+        "std": std,
+    }
+
+
+def predict_batch(starts, ends, offsets, method="mean", z=1.0):
+    """Predict every user's next period start.
+
+    Returns the gap statistics plus "predicted", "window_low" and "window_high"
+    as day ordinals (-1 for users with fewer than two cycles). The window is
+    the prediction plus or minus z standard deviations of the user's gaps.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown prediction method: {method}")
+    stats = gap_statistics(starts, ends, offsets)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+
+    has_gaps = stats["count"] > 0
+    last_end = np.where(has_gaps, ends[np.maximum(offsets[1:] - 1, 0)] if len(ends) else 0, 0)
+    centre = np.where(has_gaps, stats[method], 0.0)
+    spread = np.where(has_gaps, np.ceil(z * stats["std"]), 0.0)
+
+    # Whole days only: a fractional average lands on the day it starts in
+    predicted = last_end + np.floor(centre).astype(np.int64)
+    stats["predicted"] = np.where(has_gaps, predicted, -1)
+    stats["window_low"] = np.where(has_gaps, predicted - spread.astype(np.int64), -1)
+    stats["window_high"] = np.where(has_gaps, predicted + spread.astype(np.int64), -1)
+    return stats
+
+
+def predict_user(cycles, method="mean", z=1.0):
+    """Predict the next period for one user's sorted cycles.
+
+    Returns a dict with "next_start", "window_low" and "window_high" dates, or
+    None if there are fewer than two cycles.
+    """
+    if len(cycles) < 2:
+        return None
+    result = predict_batch(*cycles_to_arrays([cycles]), method=method, z=z)
+    return {
+        "next_start": date.fromordinal(int(result["predicted"][0])),
+        "window_low": date.fromordinal(int(result["window_low"][0])),
+        "window_high": date.fromordinal(int(result["window_high"][0])),
+        "mean": float(result["mean"][0]),
+        "std": float(result["std"][0]),
+    }
+
+
+def predict_from_stats(stats, z=1.0):
+    """Predict the next period from a user's RunningStats in constant time.
+
+    Gives the same result as predict_user(cycles) with the "mean" method, or
+    None if there are fewer than two cycles.
+    """
+    if stats.count == 0:
+        return None
+    # The integer total gives an exact mean, so the date never flips on rounding error
+    next_start = stats.last_end + timedelta(days=math.floor(stats.total / stats.count))
+    spread = timedelta(days=math.ceil(z * stats.std))
+    return {
+        "next_start": next_start,
+        "window_low": next_start - spread,
+        "window_high": next_start + spread,
+        "mean": stats.total / stats.count,
+        "std": stats.std,
+    }
+
+
+def forecast_from_stats(stats, period_days, periods, z=1.0):
+    """Forecast the next few periods from a user's RunningStats.
+
+    Returns predict_from_stats(stats, z) plus "forecasts": one dict per period
+    with "start", "end", "window_low", "window_high", "ovulation",
+    "fertile_start" and "fertile_end" dates. period_days is how long a period
+    usually lasts. The first forecast starts on the same day as next_start;
+    the window widens for periods further ahead. Returns None with fewer than
+    two cycles.
+    """
+    prediction = predict_from_stats(stats, z)
+    if prediction is None:
+        return None
+
+    forecasts = []
+    for k in range(1, periods + 1):
+        # k gaps and k - 1 periods after the last logged period, rounded once so errors do not add up
+        offset = math.floor((k * stats.total + (k - 1) * period_days * stats.count) / stats.count)
+        start = stats.last_end + timedelta(days=offset)
+        spread = timedelta(days=math.ceil(z * stats.std * math.sqrt(k)))  # Uncertainty grows with each cycle
+        ovulation = start - timedelta(days=LUTEAL_DAYS)
+        forecasts.append({
+            "start": start,
+            "end": start + timedelta(days=period_days),
+            "window_low": start - spread,
+            "window_high": start + spread,
+            "ovulation": ovulation,
+            "fertile_start": ovulation - timedelta(days=FERTILE_DAYS_BEFORE),
+            "fertile_end": ovulation + timedelta(days=FERTILE_DAYS_AFTER),
+        })
+    prediction["forecasts"] = forecasts
+    return prediction
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Most predictions kept, and how many seconds one is trusted (None: until the data changes)
+MAX_ENTRIES = 1024
+TTL_SECONDS = None
+
+
+# Class to remember each user's latest prediction until their cycles change
+class PredictionCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, clock=time.monotonic):
+        """Create an empty cache holding at most max_entries results, least recently used evicted first."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # (user, variant) -> (version, time stored, result)
+        self._variants = {}  # user -> variants cached for that user, so invalidate() finds them all
+        self._lock = threading.Lock()  # Shared by the service's worker threads
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Dropped to make room
+        self.expirations = 0  # Dropped because they were older than ttl
+        self.invalidations = 0  # Dropped because the user's cycles changed
+
+    def get(self, user, version, compute, variant=None):
+        """Return the result for user at this data version, calling compute() only if it is not cached.
+
+        variant tells apart different results for the same user and data
+        (for example how many periods were forecast); each is cached on its
+        own. The result is shared between callers, so treat it as read-only.
+        """
+        key = (user, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version and not self._expired(entry):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                if entry[0] == version:
+                    self.expirations += 1
+                self._drop(key)
+            self.misses += 1
+
+        # Worked out without the lock, so one slow prediction does not hold up other users
+        result = compute()
+        with self._lock:
+            self._entries[key] = (version, self._clock(), result)
+            self._entries.move_to_end(key)
+            self._variants.setdefault(user, set()).add(variant)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return result
+
+    def invalidate(self, user):
+        """Drop all of a user's predictions (called when their cycles are added, edited or deleted)."""
+        with self._lock:
+            for variant in list(self._variants.get(user, ())):
+                self._drop((user, variant))
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every prediction and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._variants.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def stats(self):
+        """Return the hit and miss counters and the number of cached results."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0, "evictions": self.evictions,
+                    "expirations": self.expirations, "invalidations": self.invalidations}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        """Remove one entry (called with self._lock held)."""
+        del self._entries[key]
+        user, variant = key
+        variants = self._variants[user]
+        variants.discard(variant)
+        if not variants:
+            del self._variants[user]
+
+    def _expired(self, entry):
+        return self.ttl is not None and self._clock() - entry[1] > self.ttl
+
+
+# Shared cache used by MenstrualTracker (the app and the service)
+prediction_cache = PredictionCache()
@@ -0,0 +1,330 @@
+"""Headless HTTP/JSON service for the Menstrual Tracker.
+
+Runs the same login and cycle logic as the Tkinter app, without a window,
+so one process can serve many users at once. Start it with:
+    python service.py --port 8080
+
+Endpoints (JSON request bodies and replies):
+    POST /register  {"username": ..., "password": ...}
+    POST /login     {"username": ..., "password": ...}  -> {"token": ...}
+    POST /logout    ends the session of the token sent
+    POST /cycles    {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "flow": "light"}
+    GET  /cycles    optional ?from=YYYY-MM-DD&to=YYYY-MM-DD
+    GET  /predict   optional ?periods=N (how many periods to forecast)
+    GET  /metrics   prediction cache hits and misses
+The cycle endpoints need an "Authorization: Bearer <token>" header.
+"""
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+
+from core import login_user, register_user
+from cycle_store import DATA_DIR
+from dates import parse_date
+from instrumentation import start_from_environment
+from prediction_cache import prediction_cache
+from sessions import MAX_OPEN_SHARDS, SessionManager
+
+# Most periods a single /predict request can ask to forecast
+MAX_FORECAST_PERIODS = 24
+
+logger = logging.getLogger(__name__)
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 500: "Internal Server Error"}
+
+
+# Error raised by a handler to send an HTTP error reply
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _to_json(value):
+    """Convert dates (also inside dicts and lists) to YYYY-MM-DD strings."""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+# Class that answers API requests, running the blocking work on a thread pool
+class TrackerService:
+    def __init__(self, workers=4, data_dir=DATA_DIR, user_store=None, max_open=MAX_OPEN_SHARDS):
+        """Create the service. user_store defaults to the app's user database."""
+        self.user_store = user_store
+        self.sessions = SessionManager(max_open, data_dir)  # Logged-in users and their open cycle data
+        self._executor = ThreadPoolExecutor(max_workers=workers)  # Password hashing and disk I/O run here
+
+    async def handle(self, method, path, query, headers, body):
+        """Answer one request. Returns (status, JSON-friendly reply)."""
+        routes = {
+            ("POST", "/register"): self._register,
+            ("POST", "/login"): self._login,
+            ("POST", "/logout"): self._logout,
+            ("POST", "/cycles"): self._add_cycle,
+            ("GET", "/cycles"): self._list_cycles,
+            ("GET", "/predict"): self._predict,
+            ("GET", "/metrics"): self._metrics,
+        }
+        handler = routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in routes):
+                raise HTTPError(405, "Method not allowed.")
+            raise HTTPError(404, "Not found.")
+        return await handler(query, headers, body)
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        """Start listening and return the asyncio server."""
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.sessions.close()  # Flush every open user's data
+
+    # --- endpoints
+
+    async def _register(self, query, headers, body):
+        username, password = self._credentials(body)
+        try:
+            created = await self._run(register_user, username, password, self.user_store)
+        except ValueError as error:
+            raise HTTPError(400, str(error)) from None
+        if not created:
+            raise HTTPError(409, "That username is already taken.")
+        return 201, {"username": username}
+
+    async def _login(self, query, headers, body):
+        username, password = self._credentials(body)
+        if not await self._run(login_user, username, password, self.user_store):
+            raise HTTPError(401, "Invalid username or password.")
+        return 200, {"token": self.sessions.open_session(username)}
+
+    async def _logout(self, query, headers, body):
+        self._session_user(headers)  # 401 if the token is unknown or has expired
+        self.sessions.close_session(headers["authorization"][len("Bearer "):])
+        return 200, {}
+
+    async def _add_cycle(self, query, headers, body):
+        username = self._session_user(headers)
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Expected a JSON object.")
+        try:
+            cycle = await self._run(self.sessions.call, username, "add_cycle",
+                                    body.get("start", ""), body.get("end", ""), body.get("flow", "light"))
+        except ValueError as error:
+            raise HTTPError(400, str(error)) from None
+        return 201, cycle
+
+    async def _list_cycles(self, query, headers, body):
+        username = self._session_user(headers)
+        try:
+            range_start = parse_date(query["from"][0]) if "from" in query else None
+            range_end = parse_date(query["to"][0]) if "to" in query else None
+        except ValueError:
+            raise HTTPError(400, "Please enter the date in the format YYYY-MM-DD.") from None
+        return 200, {"cycles": await self._run(self.sessions.call, username, "cycles", range_start, range_end)}
+
+    async def _predict(self, query, headers, body):
+        username = self._session_user(headers)
+        args = ()
+        if "periods" in query:
+            try:
+                args = (min(max(1, int(query["periods"][0])), MAX_FORECAST_PERIODS),)
+            except ValueError:
+                raise HTTPError(400, "periods must be a whole number.") from None
+        return 200, {"prediction": await self._run(self.sessions.call, username, "predict_next_period", *args)}
+
+    async def _metrics(self, query, headers, body):
+        return 200, {"prediction_cache": prediction_cache.stats()}
+
+    # --- helpers
+
+    async def _run(self, function, *args):
+        """Run a blocking function on the worker pool without stalling other requests."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _session_user(self, headers):
+        auth = headers.get("authorization", "")
+        username = self.sessions.user_for(auth[len("Bearer "):]) if auth.startswith("Bearer ") else None
+        if username is None:
+            raise HTTPError(401, "Please log in first.")
+        return username
+
+    @staticmethod
+    def _credentials(body):
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Expected a JSON object.")
+        username, password = body.get("username"), body.get("password")
+        # null, numbers and the like are refused rather than turned into text such as "None"
+        if not isinstance(username, str) or not isinstance(password, str) or not username or not password:
+            raise HTTPError(400, "Please enter both a username and password.")
+        return username, password
+
+    async def _handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, headers, raw_body = await self._read_request(request_line, reader)
+                except HTTPError as error:
+                    # The rest of the stream cannot be trusted, so answer and close the connection
+                    await self._send(writer, error.status, {"error": error.message}, keep_alive=False)
+                    break
+
+                url = urlsplit(target)
+                try:
+                    body = json.loads(raw_body) if raw_body else None
+                    status, reply = await self.handle(method, url.path, parse_qs(url.query), headers, body)
+                except HTTPError as error:
+                    status, reply = error.status, {"error": error.message}
+                except json.JSONDecodeError:
+                    status, reply = 400, {"error": "The request body is not valid JSON."}
+                except Exception:
+                    logger.exception("Error while handling %s %s", method, url.path)
+                    status, reply = 500, {"error": "Internal server error."}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._send(writer, status, reply, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client went away part way through
+        except Exception:
+            logger.exception("Error on a client connection")
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(request_line, reader):
+        """Read the headers and body after a request line. Raises HTTPError(400) if it is not valid HTTP."""
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise HTTPError(400, "Malformed request line.")
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, colon, value = line.decode("latin-1").partition(":")
+            if not colon:
+                raise HTTPError(400, "Malformed header line.")
+            headers[name.strip().lower()] = value.strip()
+
+        length = headers.get("content-length", "0")
+        if not length.isdigit():
+            raise HTTPError(400, "Content-Length must be a whole number.")
+        return method, target, headers, await reader.readexactly(int(length))
+
+    @staticmethod
+    async def _send(writer, status, reply, keep_alive):
+        """Write one JSON reply."""
+        payload = json.dumps(_to_json(reply)).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+        await writer.drain()
+
+
+# Class to call the service from Python code, for example in tests or scripts
+class ServiceClient:
+    def __init__(self, host="127.0.0.1", port=8080):
+        self.host = host
+        self.port = port
+        self.token = None  # Set by login()
+
+    async def request(self, method, path, body=None):
+        """Send one request and return (status, decoded JSON reply)."""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            payload = json.dumps(body).encode("utf-8") if body is not None else b""
+            head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n"
+            if self.token:
+                head += f"Authorization: Bearer {self.token}\r\n"
+            writer.write(head.encode("latin-1") + b"\r\n" + payload)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            return status, json.loads(await reader.readexactly(length))
+        finally:
+            writer.close()
+
+    async def register(self, username, password):
+        return await self.request("POST", "/register", {"username": username, "password": password})
+
+    async def login(self, username, password):
+        status, reply = await self.request("POST", "/login", {"username": username, "password": password})
+        if status == 200:
+            self.token = reply["token"]
+        return status, reply
+
+    async def logout(self):
+        status, reply = await self.request("POST", "/logout")
+        self.token = None
+        return status, reply
+
+    async def add_cycle(self, start, end, flow="light"):
+        return await self.request("POST", "/cycles", {"start": start, "end": end, "flow": flow})
+
+    async def list_cycles(self, range_start=None, range_end=None):
+        params = "&".join(f"{name}={value}" for name, value in (("from", range_start), ("to", range_end)) if value)
+        return await self.request("GET", "/cycles" + (f"?{params}" if params else ""))
+
+    async def predict(self, periods=None):
+        return await self.request("GET", "/predict" + (f"?periods={periods}" if periods else ""))
+
+    async def metrics(self):
+        return await self.request("GET", "/metrics")
+
+
+async def _serve_forever(host, port, workers, max_open):
+    service = TrackerService(workers=workers, max_open=max_open)
+    server = await service.serve(host, port)
+    print(f"Menstrual Tracker service listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Menstrual Tracker as a local HTTP/JSON service.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=4, help="size of the worker thread pool")
+    parser.add_argument("--max-open", type=int, default=MAX_OPEN_SHARDS, help="users whose cycle data is kept in memory")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    start_from_environment()  # TRACKER_TIMINGS / TRACKER_PROFILE, see instrumentation.py
+    try:
+        asyncio.run(_serve_forever(args.host, args.port, args.workers, args.max_open))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
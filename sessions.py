@@ -0,0 +1,162 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from core import MenstrualTracker
+from cycle_store import DATA_DIR
+
+# How many users' cycle data can be open at once before the least recently used is closed
+MAX_OPEN_SHARDS = 128
+
+# Session tokens expire after this many seconds without use, and at most MAX_SESSIONS are kept
+# (the least recently used is logged out first)
+SESSION_TTL_SECONDS = 12 * 60 * 60
+MAX_SESSIONS = 100000
+
+
+# One user's open cycle data plus the lock that serialises work on it
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tracker = None  # Loaded on first use, inside self.lock
+        self.closed = False  # Set once evicted; a new _Shard is made if the user comes back
+        self.finished = threading.Event()  # Set once an evicted shard has been flushed and closed
+
+
+# Class to map logged-in users to their own cycle data, keeping only recent users in memory
+class SessionManager:
+    def __init__(self, max_open=MAX_OPEN_SHARDS, data_dir=DATA_DIR, session_ttl=SESSION_TTL_SECONDS,
+                 max_sessions=MAX_SESSIONS, clock=time.monotonic):
+        """Create a manager that keeps at most max_open users' data loaded."""
+        self.max_open = max(1, max_open)
+        self.data_dir = data_dir
+        self.session_ttl = session_ttl
+        self.max_sessions = max(1, max_sessions)
+        self._clock = clock
+        self._sessions = OrderedDict()  # token -> (username, time last used), least recently used first
+        self._shards = OrderedDict()  # username -> _Shard, least recently used first
+        self._closing = {}  # username -> evicted _Shard that is still being flushed and closed
+        self._lock = threading.Lock()  # Guards the dicts above, never held while loading or saving data
+
+    def open_session(self, username):
+        """Start a session for a user who has logged in and return its token."""
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            now = self._clock()
+            self._sessions[token] = (username, now)
+            # Oldest first, so expired tokens and those over the cap are all at the front
+            while self._sessions:
+                oldest_token, (_, last_used) = next(iter(self._sessions.items()))
+                if len(self._sessions) <= self.max_sessions and now - last_used <= self.session_ttl:
+                    break
+                del self._sessions[oldest_token]
+        return token
+
+    def close_session(self, token):
+        """End a session (log out). The user's data stays cached until it is evicted."""
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def user_for(self, token):
+        """Return the username of a session, or None if the token is unknown or has expired."""
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            now = self._clock()
+            if now - session[1] > self.session_ttl:
+                del self._sessions[token]
+                return None
+            self._sessions[token] = (session[0], now)  # Using a session keeps it alive
+            self._sessions.move_to_end(token)
+            return session[0]
+
+    @contextmanager
+    def tracker(self, username):
+        """Give exclusive use of a user's MenstrualTracker for the duration of a with block.
+
+        Different users never wait for each other. Opening a user may evict
+        the least recently used one; that user is closed by this thread
+        after the manager's lock is released.
+        """
+        while True:
+            evicted = []
+            with self._lock:
+                closing = self._closing.get(username)
+                if closing is None:
+                    shard = self._shards.get(username)
+                    if shard is None:
+                        shard = self._shards[username] = _Shard()
+                        evicted = self._evict_extra()
+                    else:
+                        self._shards.move_to_end(username)
+
+            if closing is not None:
+                # The user's old data is still being written; reopening now would read a stale log
+                closing.finished.wait()
+                continue
+            self._close_shards(evicted)
+
+            with shard.lock:
+                if shard.closed:
+                    continue  # Evicted between the lookup and getting the lock; look it up again
+                if shard.tracker is None:
+                    # Statistics are written when the shard is flushed, not after every change
+                    shard.tracker = MenstrualTracker(username, self.data_dir, autoflush=False)
+                yield shard.tracker
+                return
+
+    def call(self, username, method, *args):
+        """Call a MenstrualTracker method for a user (convenient for worker pools)."""
+        with self.tracker(username) as tracker:
+            return getattr(tracker, method)(*args)
+
+    def flush_all(self):
+        """Write every open user's pending statistics to disk."""
+        with self._lock:
+            shards = list(self._shards.values())
+        for shard in shards:
+            with shard.lock:
+                if shard.tracker is not None:
+                    shard.tracker.store.flush()
+
+    def close(self):
+        """Flush and close every open user's data."""
+        with self._lock:
+            shards = list(self._shards.items())
+            self._shards.clear()
+            self._closing.update(shards)
+        self._close_shards(shards)
+
+    def __len__(self):
+        return len(self._shards)
+
+    def _evict_extra(self):
+        """Take least recently used users out until at most max_open remain (called with self._lock held).
+
+        Returns the (username, _Shard) pairs taken out. They are marked as
+        closing, so tracker() waits for _close_shards() before reopening them.
+        """
+        evicted = []
+        while len(self._shards) > self.max_open:
+            username, shard = self._shards.popitem(last=False)
+            self._closing[username] = shard
+            evicted.append((username, shard))
+        return evicted
+
+    def _close_shards(self, shards):
+        """Flush and close (username, _Shard) pairs marked as closing (called without self._lock)."""
+        for username, shard in shards:
+            try:
+                with shard.lock:  # Waits for that user's current request, not anyone else's
+                    shard.closed = True
+                    if shard.tracker is not None:
+                        shard.tracker.close()  # Flush on evict
+                        shard.tracker = None
+            finally:
+                with self._lock:
+                    if self._closing.get(username) is shard:
+                        del self._closing[username]
+                shard.finished.set()
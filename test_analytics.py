@@ -0,0 +1,102 @@
+"""Tests for the population analytics job."""
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+
+import analytics
+from analytics import COLUMNS, FLAG_IRREGULAR, FLAG_LONG, FLAG_SHORT, log_paths, summarise_chunk
+from cycle_array import FLOWS
+from cycle_store import CycleStore, shard_path
+
+
+class AnalyticsTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.data_dir = self.folder.name
+        self.usernames = []
+
+        # Cycle lengths (start to next start), period days and flows for each user
+        self.write_user("bob", [28, 28, 28], 5, ["light", "medium", "heavy", "heavy"])
+        self.write_user("amy", [18, 20], 3, ["light", "light", "medium"])  # Short cycles
+        self.write_user("cat", [25, 40], 4, ["heavy", "heavy", "heavy"])  # Irregular
+        self.write_user("dan", [], 6, ["medium"])  # Only one period: nothing to measure between
+
+    def write_user(self, username, lengths, period_days, flows):
+        self.usernames.append(username)
+        store = CycleStore(username, self.data_dir)
+        start = date(2024, 1, 1)
+        cycles = []
+        for length, flow in zip(lengths + [0], flows):
+            cycles.append((start, start + timedelta(days=period_days - 1), flow))
+            start += timedelta(days=length)
+        store.add_many(cycles)
+        store.close()
+
+    def summary_for(self, columns):
+        """Return {username: {column: value}} for the test users."""
+        names = {os.path.basename(shard_path(name, self.data_dir))[:-len(".log")]: name for name in self.usernames}
+        return {names[user]: {name: columns[name][i] for name in COLUMNS}
+                for i, user in enumerate(columns["user"])}
+
+    def test_summarise_chunk(self):
+        columns, histograms = summarise_chunk(log_paths(self.data_dir))
+        self.assertEqual(set(columns), set(COLUMNS))
+        users = self.summary_for(columns)
+
+        bob = users["bob"]
+        self.assertEqual(bob["cycles"], 4)
+        self.assertEqual(bob["mean_gap"], 24)  # 28 day cycles with 5 day periods
+        self.assertEqual(bob["median_gap"], 24)
+        self.assertEqual(bob["std_gap"], 0)
+        self.assertEqual((bob["mean_cycle_length"], bob["min_cycle_length"], bob["max_cycle_length"]), (28, 28, 28))
+        self.assertEqual(bob["mean_period_days"], 5)
+        self.assertEqual([bob[flow] for flow in FLOWS], [1, 1, 2])
+        self.assertEqual(bob["flags"], 0)
+
+        self.assertEqual(users["amy"]["mean_cycle_length"], 19)
+        self.assertEqual(users["amy"]["flags"], FLAG_SHORT)
+        self.assertEqual((users["cat"]["min_cycle_length"], users["cat"]["max_cycle_length"]), (25, 40))
+        self.assertEqual(users["cat"]["flags"], FLAG_IRREGULAR)
+
+        dan = users["dan"]
+        self.assertEqual(dan["cycles"], 1)
+        self.assertTrue(np.isnan(dan["mean_gap"]) and np.isnan(dan["mean_cycle_length"]))
+        self.assertEqual((dan["min_cycle_length"], dan["max_cycle_length"]), (-1, -1))
+        self.assertEqual(dan["mean_period_days"], 6)
+        self.assertEqual(dan["flags"], 0)
+
+        lengths = histograms["cycle_length_hist"]
+        self.assertEqual(len(lengths), analytics.MAX_CYCLE_LENGTH + 1)
+        self.assertEqual({day: int(lengths[day]) for day in np.flatnonzero(lengths)}, {18: 1, 20: 1, 25: 1, 28: 3, 40: 1})
+        self.assertEqual({day: int(n) for day, n in enumerate(histograms["period_days_hist"]) if n},
+                         {3: 3, 4: 3, 5: 4, 6: 1})
+        self.assertEqual(list(histograms["flow_totals"]), [3, 3, 5])
+
+    def test_long_cycles_are_flagged(self):
+        self.write_user("eve", [40, 42], 5, ["light"] * 3)
+        users = self.summary_for(summarise_chunk(log_paths(self.data_dir))[0])
+        self.assertEqual(users["eve"]["flags"], FLAG_LONG)
+
+    def test_run_with_a_pool_matches_one_chunk(self):
+        expected, expected_hist = summarise_chunk(log_paths(self.data_dir))
+        out = os.path.join(self.folder.name, "summary.npz")
+        columns, histograms = analytics.run(self.data_dir, out, workers=2, chunk_size=1)
+        for name in COLUMNS:
+            np.testing.assert_array_equal(columns[name], expected[name])
+        for name in expected_hist:
+            np.testing.assert_array_equal(histograms[name], expected_hist[name])
+        with np.load(out) as saved:
+            np.testing.assert_array_equal(saved["mean_gap"], expected["mean_gap"])
+
+    def test_no_users(self):
+        columns, histograms = summarise_chunk([])
+        self.assertEqual(len(columns["user"]), 0)
+        self.assertEqual(int(histograms["cycle_length_hist"].sum()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for BackgroundRunner, with a stand-in for the Tk root."""
+import threading
+import unittest
+from concurrent.futures import Future
+
+from background import BackgroundRunner
+
+
+# Stand-in for a Tk root: after() callbacks are queued and run by run_pending()
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for callback in scheduled:
+            callback()
+
+
+# Future whose done() turns True after it has been asked a set number of times
+class FlakyFuture(Future):
+    def __init__(self, done_after):
+        super().__init__()
+        self.calls = 0
+        self.done_after = done_after
+
+    def done(self):
+        self.calls += 1
+        if self.calls > self.done_after and not super().done():
+            self.set_result("late")
+        return super().done()
+
+
+class BackgroundRunnerTests(unittest.TestCase):
+    def setUp(self):
+        self.root = FakeRoot()
+        self.runner = BackgroundRunner(self.root, poll_ms=0)
+        self.addCleanup(self.runner.shutdown, True)
+
+    def poll_until_idle(self):
+        for _ in range(1000):
+            if not self.root.scheduled:
+                return
+            self.root.run_pending()
+            threading.Event().wait(0.001)
+        self.fail("the runner never stopped polling")
+
+    def test_results_and_errors_reach_the_callbacks(self):
+        results, errors = [], []
+        self.runner.submit(lambda: 42, on_done=results.append, on_error=errors.append)
+        self.runner.submit(lambda: 1 / 0, on_done=results.append, on_error=errors.append)
+        self.poll_until_idle()
+        self.assertEqual(results, [42])
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+        self.assertFalse(self.runner._polling)
+
+    def test_task_finishing_during_a_poll_is_reported(self):
+        results = []
+        future = FlakyFuture(done_after=1)  # Not done on the first check, done on any later one
+        self.runner._pending.append((future, results.append, None))
+        self.runner._polling = True
+        self.runner._poll()
+        self.poll_until_idle()
+        self.assertEqual(results, ["late"])
+        self.assertEqual(self.runner._pending, [])
+
+    def test_shutdown_can_let_queued_tasks_finish(self):
+        started = threading.Event()
+        release = threading.Event()
+        saved = []
+        self.runner.submit(lambda: (started.set(), release.wait(5)))
+        self.runner.submit(saved.append, "cycle")
+        started.wait(5)
+        release.set()
+        self.runner.shutdown(wait=True, cancel_futures=False)
+        self.assertEqual(saved, ["cycle"])
+
+
+if __name__ == "__main__":
+    unittest.main()
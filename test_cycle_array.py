@@ -0,0 +1,102 @@
+"""Tests for CycleArray: the compact cycle columns, their views and the binary file format."""
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from cycle_array import CycleArray
+
+
+def make_cycles(count):
+    """Return count cycle dicts, a month apart, cycling through the flows."""
+    first = date(2024, 1, 1).toordinal()
+    return [{"start": date.fromordinal(first + 30 * i), "end": date.fromordinal(first + 30 * i + 4),
+             "flow": ("light", "medium", "heavy")[i % 3]} for i in range(count)]
+
+
+class CycleArrayTests(unittest.TestCase):
+    def setUp(self):
+        self.cycles = make_cycles(10)
+        self.array = CycleArray.from_cycles(self.cycles)
+
+    def test_behaves_like_a_list_of_cycle_dicts(self):
+        self.assertEqual(len(self.array), 10)
+        self.assertEqual(list(self.array), self.cycles)
+        self.assertEqual(self.array[3], self.cycles[3])
+        self.assertEqual(self.array[-1], self.cycles[-1])
+        del self.array[0]
+        self.array.insert(2, self.cycles[0])
+        self.assertEqual(self.array[2], self.cycles[0])
+
+    def test_bad_flow_leaves_the_columns_untouched(self):
+        with self.assertRaises(ValueError):
+            self.array.insert(0, {"start": date(2020, 1, 1), "end": date(2020, 1, 2), "flow": "Heavy"})
+        self.assertEqual(list(self.array), self.cycles)
+
+    def test_slices_are_views(self):
+        view = self.array[2:5]
+        self.assertEqual(list(view), self.cycles[2:5])
+        self.array.starts[2] += 1  # Same memory, so the view sees the change
+        self.assertEqual(view[0]["start"].toordinal(), self.cycles[2]["start"].toordinal() + 1)
+
+    def test_stepped_slices_copy_and_convert(self):
+        for index in (slice(None, None, 2), slice(None, None, -1), slice(7, 1, -3)):
+            view = self.array[index]
+            self.assertEqual(list(view), self.cycles[index])
+            self.assertEqual(list(view.copy()), self.cycles[index])
+            starts, ends, flows = view.to_numpy()
+            self.assertEqual(starts.tolist(), [cycle["start"].toordinal() for cycle in self.cycles[index]])
+            self.assertEqual(flows.dtype.itemsize, 1)
+
+    def test_to_numpy_shares_memory(self):
+        starts, ends, flows = self.array.to_numpy()
+        self.assertEqual(starts.dtype.name, "int32")
+        starts[0] += 1
+        self.assertEqual(self.array.starts[0], self.cycles[0]["start"].toordinal() + 1)
+
+    def test_copy_is_independent_and_writable(self):
+        copied = self.array[::2].copy()
+        copied.append(self.cycles[1])
+        self.assertEqual(len(copied), 6)
+        self.assertEqual(len(self.array), 10)
+
+
+class CycleArrayFileTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, "cycles.cyc")
+
+    def test_save_and_load_round_trip(self):
+        original = CycleArray.from_cycles(make_cycles(25))
+        original.save(self.path, extra=1234)
+        loaded, extra = CycleArray.load(self.path)
+        self.assertEqual(extra, 1234)
+        self.assertEqual(loaded, original)
+        self.assertEqual(loaded.copy(), original)
+
+    def test_stepped_view_can_be_saved(self):
+        original = CycleArray.from_cycles(make_cycles(9))
+        original[::3].save(self.path)
+        loaded, _ = CycleArray.load(self.path)
+        self.assertEqual(list(loaded), make_cycles(9)[::3])
+
+    def test_empty_array(self):
+        CycleArray().save(self.path)
+        loaded, _ = CycleArray.load(self.path)
+        self.assertEqual(len(loaded), 0)
+
+    def test_truncated_or_foreign_files_are_rejected(self):
+        CycleArray.from_cycles(make_cycles(5)).save(self.path)
+        with open(self.path, "r+b") as file:
+            file.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(ValueError):
+            CycleArray.load(self.path)
+        with open(self.path, "wb") as file:
+            file.write(b"not a cycle array file at all")
+        with self.assertRaises(ValueError):
+            CycleArray.load(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for bulk import and export of cycle history."""
+import csv
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from cycle_io import export_cycles, import_cycles
+from cycle_store import CycleStore
+
+
+class CycleIOTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.data_dir = os.path.join(self.folder.name, "data")
+
+    def path(self, name):
+        return os.path.join(self.folder.name, name)
+
+    def write_csv(self, name, rows):
+        with open(self.path(name), "w", newline="") as file:
+            csv.writer(file).writerows([("username", "start", "end", "flow")] + rows)
+        return self.path(name)
+
+    def test_import_rejects_bad_rows_and_reports_them(self):
+        source = self.write_csv("in.csv", [
+            ("bob", "2024-01-01", "2024-01-05", "light"),
+            ("bob", "2024-02-30", "2024-03-01", "light"),  # No such date
+            ("bob", "2024-03-05", "2024-03-01", "light"),  # Ends before it starts
+            ("bob", "2024-04-01", "2024-04-03", "Heavy"),
+            ("", "2024-05-01", "2024-05-03", "light"),  # No username
+            ("amy", "2024-01-10", "2024-01-12", "heavy"),
+        ])
+        summary = import_cycles(source, error_report=self.path("errors.csv"), data_dir=self.data_dir)
+        self.assertEqual(summary, {"rows": 6, "imported": 2, "skipped": 0, "rejected": 4})
+
+        with open(self.path("errors.csv"), newline="") as file:
+            report = list(csv.reader(file))
+        self.assertEqual(report[0], ["line", "error", "row"])
+        self.assertEqual([row[0] for row in report[1:]], ["3", "4", "5", "6"])
+        self.assertEqual(len(CycleStore("bob", self.data_dir)), 1)
+        self.assertEqual(len(CycleStore("amy", self.data_dir)), 1)
+
+    def test_jsonl_with_default_user_and_bad_lines(self):
+        with open(self.path("in.jsonl"), "w") as file:
+            file.write(json.dumps({"start": "2024-01-01", "end": "2024-01-04"}) + "\n\n")
+            file.write("{not json\n")
+            file.write("[1, 2]\n")
+        summary = import_cycles(self.path("in.jsonl"), username="bob", data_dir=self.data_dir)
+        self.assertEqual(summary, {"rows": 3, "imported": 1, "skipped": 0, "rejected": 2})
+        self.assertEqual(list(CycleStore("bob", self.data_dir))[0]["flow"], "light")
+
+    def test_running_an_import_again_skips_stored_cycles(self):
+        rows = [("bob", "2024-01-01", "2024-01-05", "light"), ("bob", "2024-02-01", "2024-02-04", "heavy"),
+                ("bob", "2024-02-01", "2024-02-04", "heavy")]  # Repeated within the file
+        source = self.write_csv("in.csv", rows)
+        self.assertEqual(import_cycles(source, batch_size=2, data_dir=self.data_dir)["skipped"], 1)
+        self.assertEqual(import_cycles(source, data_dir=self.data_dir)["skipped"], 3)
+        self.assertEqual(len(CycleStore("bob", self.data_dir)), 2)
+
+        summary = import_cycles(source, data_dir=self.data_dir, skip_existing=False)
+        self.assertEqual(summary["imported"], 3)
+        self.assertEqual(len(CycleStore("bob", self.data_dir)), 5)
+
+    def test_export_round_trip(self):
+        source = self.write_csv("in.csv", [("bob", "2024-01-01", "2024-01-05", "light"),
+                                           ("amy", "2024-01-10", "2024-01-12", "heavy")])
+        import_cycles(source, data_dir=self.data_dir)
+        for name in ("out.csv", "out.jsonl"):
+            self.assertEqual(export_cycles(self.path(name), ["bob", "amy", "nobody"], data_dir=self.data_dir), 2)
+            other = os.path.join(self.folder.name, "copy-" + name)
+            import_cycles(self.path(name), data_dir=other)
+            self.assertEqual(list(CycleStore("amy", other)), list(CycleStore("amy", self.data_dir)))
+
+    def test_export_changes_no_files(self):
+        store = CycleStore("bob", self.data_dir)
+        store.add(date(2024, 1, 1), date(2024, 1, 5), "light")
+        store.close()
+        with open(store.path, "a") as file:
+            file.write('{"op": "add", "start": "2024-02-01"')  # Another process part way through an append
+        os.remove(store.stats_path)
+        before = sorted(os.listdir(os.path.dirname(store.path)))
+        size = os.path.getsize(store.path)
+
+        self.assertEqual(export_cycles(self.path("out.csv"), ["bob"], data_dir=self.data_dir), 1)
+        self.assertEqual(os.path.getsize(store.path), size)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(store.path))), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
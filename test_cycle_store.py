@@ -0,0 +1,146 @@
+"""Tests for CycleStore: the append-only log, its recovery and the sorted index."""
+import os
+import random
+import statistics
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from cycle_store import CycleStore
+
+
+def brute_force_gaps(store):
+    """Gaps worked out from scratch from the store's sorted cycles."""
+    cycles = list(store)
+    return [(cycles[i]["start"] - cycles[i - 1]["end"]).days for i in range(1, len(cycles))]
+
+
+class CycleLogTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def make_store(self, months):
+        store = CycleStore("alice", self.folder.name)
+        for month in months:
+            store.add(date(2024, month, 1), date(2024, month, 5), "light")
+        store.close()
+        return store
+
+    def test_torn_tail_is_cut_off(self):
+        store = self.make_store([1, 2])
+        size = os.path.getsize(store.path)
+        with open(store.path, "a") as file:
+            file.write('{"op": "add", "start": "2024-03-01", "en')  # Crash in the middle of an append
+        os.remove(store.snapshot_path)
+
+        reloaded = CycleStore("alice", self.folder.name)
+        self.assertEqual(len(reloaded), 2)
+        self.assertEqual(os.path.getsize(store.path), size)
+        reloaded.add(date(2024, 3, 1), date(2024, 3, 5), "heavy")
+        self.assertEqual(len(CycleStore("alice", self.folder.name)), 3)
+
+    def test_torn_edit_keeps_the_old_cycle(self):
+        store = self.make_store([1, 2])
+        store.update(store.cycles[1], date(2024, 2, 3), date(2024, 2, 6), "heavy")
+        store.close()
+        with open(store.path, "r+b") as file:
+            file.truncate(os.path.getsize(store.path) - 20)  # Crash near the end of writing the edit
+        os.remove(store.snapshot_path)
+
+        reloaded = CycleStore("alice", self.folder.name)
+        self.assertEqual([cycle["start"] for cycle in reloaded], [date(2024, 1, 1), date(2024, 2, 1)])
+
+    def test_edit_is_replayed(self):
+        store = self.make_store([1, 2])
+        store.update(store.cycles[0], date(2024, 1, 2), date(2024, 1, 6), "medium")
+        store.close()
+        os.remove(store.snapshot_path)
+        self.assertEqual(list(CycleStore("alice", self.folder.name)), list(store))
+
+    def test_bad_line_is_skipped_not_truncated(self):
+        store = self.make_store([1, 2, 3])
+        with open(store.path) as file:
+            lines = file.readlines()
+        lines[0] = "not json\n"
+        lines[1] = '{"op": "add"}\n'
+        with open(store.path, "w") as file:
+            file.writelines(lines)
+        size = os.path.getsize(store.path)
+        os.remove(store.snapshot_path)
+
+        reloaded = CycleStore("alice", self.folder.name)
+        self.assertEqual([cycle["start"] for cycle in reloaded], [date(2024, 3, 1)])
+        self.assertEqual(reloaded.bad_lines, 2)
+        self.assertEqual(os.path.getsize(store.path), size)  # Nothing was cut off
+
+    def test_unknown_flow_is_rejected_before_writing(self):
+        store = self.make_store([1])
+        size = os.path.getsize(store.path)
+        with self.assertRaises(ValueError):
+            store.add(date(2024, 2, 1), date(2024, 2, 5), "Heavy")
+        self.assertEqual(os.path.getsize(store.path), size)
+        self.assertEqual(len(store.cycles.starts), len(store.cycles.flows))
+
+    def test_snapshot_round_trip(self):
+        store = self.make_store([1, 2, 3])
+        self.assertTrue(os.path.exists(store.snapshot_path))
+
+        reloaded = CycleStore("alice", self.folder.name)
+        self.assertEqual(reloaded._snapshot_size, os.path.getsize(store.path))  # Loaded from the snapshot
+        self.assertEqual(list(reloaded), list(store))
+        self.assertEqual(reloaded.stats.to_dict(), store.stats.to_dict())
+
+        # The loaded copy can be changed, and a snapshot left behind by a newer log is ignored
+        reloaded.add(date(2024, 4, 1), date(2024, 4, 5), "medium")
+        fresh = CycleStore("alice", self.folder.name)
+        self.assertEqual(len(fresh), 4)
+        self.assertEqual(list(fresh), list(reloaded))
+
+
+
+class RunningStatsTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def test_matches_brute_force_after_random_changes(self):
+        rng = random.Random(1)
+        store = CycleStore("alice", self.folder.name)
+        first = date(2020, 1, 1)
+        for step in range(300):
+            if len(store) < 2 or rng.random() < 0.6:
+                start = first + timedelta(days=rng.randint(0, 1500))
+                store.add(start, start + timedelta(days=rng.randint(0, 7)), rng.choice(("light", "medium", "heavy")))
+            elif rng.random() < 0.5:
+                store.remove(store.cycles[rng.randrange(len(store))])
+            else:
+                start = first + timedelta(days=rng.randint(0, 1500))
+                store.update(store.cycles[rng.randrange(len(store))], start, start + timedelta(days=3), "heavy")
+
+            gaps = brute_force_gaps(store)
+            self.assertEqual(store.stats.count, len(gaps))
+            self.assertEqual(store.stats.total, sum(gaps))
+            self.assertEqual(list(store.stats.recent), gaps[-store.stats.recent.maxlen:])  # Rolling window
+            if len(gaps) >= 2:
+                self.assertAlmostEqual(store.stats.mean, statistics.fmean(gaps), places=6)
+                self.assertAlmostEqual(store.stats.variance, statistics.pvariance(gaps), places=4)
+        store.close()
+
+        # Reloading gives the same statistics as the live store
+        reloaded = CycleStore("alice", self.folder.name)
+        self.assertEqual(reloaded.stats.to_dict(), store.stats.to_dict())
+
+    def test_rebuilt_when_stats_file_is_stale(self):
+        store = CycleStore("alice", self.folder.name)
+        for month in range(1, 10):
+            store.add(date(2024, month, 1), date(2024, month, 4), "light")
+        store.close()
+        os.remove(store.stats_path)
+        reloaded = CycleStore("alice", self.folder.name)
+        self.assertEqual(list(reloaded.stats.recent), brute_force_gaps(reloaded)[-reloaded.stats.recent.maxlen:])
+        self.assertEqual(reloaded.stats.total, sum(brute_force_gaps(reloaded)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""Tests for the shared date parser, which must accept exactly what strptime accepts."""
+import unittest
+from datetime import datetime
+
+from dates import DATE_FORMAT, parse_date, parse_ordinals
+
+
+# Function to parse text the way the tracker did before parse_date existed
+def strptime_date(text):
+    return datetime.strptime(text, DATE_FORMAT).date()
+
+
+class ParseDateTests(unittest.TestCase):
+    def test_matches_strptime(self):
+        texts = ["2024-01-05", "2024-1-5", "2024-01-5", "2024-1-05", "2024-12-31", "0001-01-01", "9999-12-31",
+                 "2024-02-29", "2023-02-29", "2024-02-30", "2024-13-01", "2024-00-10", "2024-01-00",
+                 "24-01-05", "2024/01/05", "20240105", "2024-01-05 ", " 2024-01-05", "2024-01-05T00:00",
+                 "2024-W01-1", "", "abcd-ef-gh"]
+        for text in texts:
+            with self.subTest(text=text):
+                try:
+                    expected = strptime_date(text)
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        parse_date(text)
+                else:
+                    self.assertEqual(parse_date(text), expected)
+
+    def test_short_form_and_impossible_day(self):
+        self.assertEqual(parse_date("2024-1-5"), datetime(2024, 1, 5).date())
+        with self.assertRaises(ValueError):
+            parse_date("2024-02-30")
+
+    def test_parse_ordinals(self):
+        ordinals = parse_ordinals(["2024-01-05", "2024-02-30", None, "2024-1-6"])
+        self.assertEqual(list(ordinals), [strptime_date("2024-01-05").toordinal(), 0, 0,
+                                          strptime_date("2024-01-06").toordinal()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests for password hashing, rehash on login and the CredentialCache."""
+import base64
+import hashlib
+import unittest
+
+import passwords
+from passwords import CredentialCache, authenticate, hash_password, needs_rehash, verify_password
+
+
+# Stand-in for UserStore holding records in a dict
+class FakeStore:
+    def __init__(self, records):
+        self.records = dict(records)
+        self.writes = 0
+
+    def get_password(self, username):
+        return self.records.get(username)
+
+    def set_password(self, username, record):
+        self.records[username] = record
+        self.writes += 1
+
+
+class VerifyPasswordTests(unittest.TestCase):
+    def test_scrypt_record(self):
+        record = hash_password("secret", n=2 ** 10)
+        self.assertTrue(verify_password(record, "secret"))
+        self.assertFalse(verify_password(record, "Secret"))
+
+    def test_pbkdf2_record(self):
+        salt = b"0123456789abcdef"
+        digest = hashlib.pbkdf2_hmac("sha256", b"secret", salt, 1000)
+        record = f"pbkdf2_sha256$1000${base64.b64encode(salt).decode()}${base64.b64encode(digest).decode()}"
+        self.assertTrue(verify_password(record, "secret"))
+        self.assertFalse(verify_password(record, "other"))
+
+    def test_plain_text_record(self):
+        self.assertTrue(verify_password("secret", "secret"))
+        self.assertFalse(verify_password("secret", "other"))
+
+    def test_malformed_records_match_nothing(self):
+        good = hash_password("secret", n=2 ** 10).split("$")
+        for record in ("scrypt$x$8$1$AAAA$AAAA",  # Cost is not a number
+                       "scrypt$1000$8$1$AAAA$AAAA",  # n is not a power of two
+                       "scrypt$1024$8$1$%%%$" + good[5],  # Salt is not base64
+                       f"scrypt$1024$8$1${good[4]}$abc",  # Hash is not base64 (bad padding)
+                       "pbkdf2_sha256$many$AAAA$AAAA",
+                       "pbkdf2_sha256$0$AAAA$AAAA",
+                       "pbkdf2_sha256$1000$AAAA$A"):
+            with self.subTest(record=record):
+                self.assertFalse(verify_password(record, "secret"))
+
+
+class RehashTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = CredentialCache()
+
+    def test_plain_text_is_rehashed_on_login(self):
+        store = FakeStore({"bob": "secret"})
+        self.assertTrue(authenticate(store, "bob", "secret", cache=self.cache))
+        record = store.records["bob"]
+        self.assertTrue(record.startswith("scrypt$"))
+        self.assertFalse(needs_rehash(record))
+        self.assertTrue(verify_password(record, "secret"))
+
+    def test_old_cost_is_rehashed_on_login(self):
+        store = FakeStore({"bob": hash_password("secret", n=2 ** 10)})
+        self.assertTrue(needs_rehash(store.records["bob"]))
+        self.assertTrue(authenticate(store, "bob", "secret", cache=self.cache))
+        self.assertTrue(store.records["bob"].startswith(f"scrypt${passwords.SCRYPT_N}$"))
+        self.assertEqual(store.writes, 1)
+
+        # The upgraded record is left alone on the next login
+        self.assertTrue(authenticate(store, "bob", "secret", cache=None))
+        self.assertEqual(store.writes, 1)
+
+    def test_wrong_password_is_not_rehashed(self):
+        store = FakeStore({"bob": "secret"})
+        self.assertFalse(authenticate(store, "bob", "wrong", cache=self.cache))
+        self.assertFalse(authenticate(store, "amy", "secret", cache=self.cache))
+        self.assertEqual(store.records["bob"], "secret")
+
+    def test_damaged_record_fails_login(self):
+        store = FakeStore({"bob": "scrypt$x$8$1$AAAA$AAAA"})
+        self.assertFalse(authenticate(store, "bob", "secret", cache=self.cache))
+
+
+class CredentialCacheTests(unittest.TestCase):
+    def test_hit_needs_same_record_and_password(self):
+        cache = CredentialCache()
+        cache.remember("bob", "record-1", "secret")
+        self.assertTrue(cache.check("bob", "record-1", "secret"))
+        self.assertFalse(cache.check("bob", "record-1", "wrong"))
+        self.assertFalse(cache.check("bob", "record-2", "secret"))  # Password changed since
+        self.assertFalse(cache.check("amy", "record-1", "secret"))
+
+    def test_forget(self):
+        cache = CredentialCache()
+        cache.remember("bob", "record", "secret")
+        cache.forget("bob")
+        self.assertFalse(cache.check("bob", "record", "secret"))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = CredentialCache(max_size=2)
+        cache.remember("bob", "r", "pw")
+        cache.remember("amy", "r", "pw")
+        self.assertTrue(cache.check("bob", "r", "pw"))  # bob is now the most recently used
+        cache.remember("cat", "r", "pw")
+        self.assertFalse(cache.check("amy", "r", "pw"))
+        self.assertTrue(cache.check("bob", "r", "pw"))
+        self.assertTrue(cache.check("cat", "r", "pw"))
+
+    def test_changed_record_misses_cache(self):
+        cache = CredentialCache()
+        store = FakeStore({"bob": hash_password("secret")})
+        self.assertTrue(authenticate(store, "bob", "secret", cache=cache))
+        store.records["bob"] = hash_password("new")
+        self.assertFalse(authenticate(store, "bob", "secret", cache=cache))
+        self.assertTrue(authenticate(store, "bob", "new", cache=cache))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Tests for the calendar highlighting: IntervalSet and PeriodCalendar (with a stand-in calendar)."""
+import unittest
+from datetime import date
+
+from period_calendar import PERIOD_TAG, IntervalSet, PeriodCalendar
+
+
+# Stand-in for tkcalendar.Calendar with just the methods PeriodCalendar uses
+class FakeCalendar:
+    def __init__(self, month, year):
+        self.month, self.year = month, year
+        self.events = {}  # id -> (day, tags)
+        self.bindings = {}
+        self.next_id = 0
+
+    def bind(self, sequence, callback):
+        self.bindings[sequence] = callback
+
+    def get_displayed_month(self):
+        return self.month, self.year
+
+    def calevent_create(self, day, text, tags):
+        self.next_id += 1
+        self.events[self.next_id] = (day, tags)
+        return self.next_id
+
+    def calevent_remove(self, *ids):
+        for event_id in ids:
+            del self.events[event_id]
+
+    def show_month(self, month, year):
+        self.month, self.year = month, year
+        self.bindings["<<CalendarMonthChanged>>"](None)
+
+    def flows_by_day(self):
+        return {day: tags[1] for day, tags in self.events.values()}
+
+
+class IntervalSetTests(unittest.TestCase):
+    def test_merges_overlapping_and_touching_ranges(self):
+        ranges = IntervalSet()
+        ranges.add(10, 15)
+        ranges.add(20, 25)
+        self.assertEqual(len(ranges), 2)
+        ranges.add(16, 16)  # Touches 10..15
+        self.assertEqual(ranges.overlapping(0, 100), [(10, 16), (20, 25)])
+        ranges.add(14, 22)  # Bridges both
+        self.assertEqual(ranges.overlapping(0, 100), [(10, 25)])
+        ranges.add(30, 31)
+        ranges.add(1, 2)
+        self.assertEqual(ranges.overlapping(0, 100), [(1, 2), (10, 25), (30, 31)])
+
+    def test_overlapping_query(self):
+        ranges = IntervalSet()
+        for start in (0, 10, 20, 30):
+            ranges.add(start, start + 3)
+        self.assertEqual(ranges.overlapping(12, 21), [(10, 13), (20, 23)])
+        self.assertEqual(ranges.overlapping(4, 9), [])
+        self.assertEqual(ranges.overlapping(3, 3), [(0, 3)])
+
+
+class PeriodCalendarTests(unittest.TestCase):
+    def test_heaviest_flow_wins_and_only_the_visible_weeks_are_drawn(self):
+        calendar = FakeCalendar(3, 2024)
+        periods = PeriodCalendar(calendar)
+        periods.add_periods([(date(2024, 3, 4), date(2024, 3, 8), "light"),
+                             (date(2024, 3, 7), date(2024, 3, 9), "heavy"),
+                             (date(2024, 8, 1), date(2024, 8, 3), "medium")])  # Not on screen
+        days = calendar.flows_by_day()
+        self.assertEqual(len(days), 6)
+        self.assertEqual(days[date(2024, 3, 6)], "light")
+        self.assertEqual(days[date(2024, 3, 7)], "heavy")
+        self.assertTrue(all(tags[0] == PERIOD_TAG for _, tags in calendar.events.values()))
+
+        calendar.show_month(8, 2024)
+        self.assertEqual(sorted(calendar.flows_by_day()), [date(2024, 8, 1), date(2024, 8, 2), date(2024, 8, 3)])
+
+    def test_period_off_screen_does_not_redraw(self):
+        calendar = FakeCalendar(3, 2024)
+        periods = PeriodCalendar(calendar)
+        periods.add_period(date(2024, 3, 4), date(2024, 3, 5), "light")
+        drawn = dict(calendar.events)
+        periods.add_period(date(2025, 1, 1), date(2025, 1, 2), "light")
+        self.assertEqual(calendar.events, drawn)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Tests for the batch prediction module, checked against plain Python versions."""
+import math
+import random
+import statistics
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+
+from cycle_stats import RunningStats
+from prediction import (FERTILE_DAYS_AFTER, FERTILE_DAYS_BEFORE, LUTEAL_DAYS, TRIM_FRACTION, cycles_to_arrays,
+                        forecast_from_stats, gap_statistics, predict_batch, predict_from_stats, predict_user)
+
+
+# Function to make one user's sorted cycles with random gaps and lengths
+def random_cycles(rng, count):
+    cycles = []
+    start = date(2020, 1, 1) + timedelta(days=rng.randrange(365))
+    for _ in range(count):
+        end = start + timedelta(days=rng.randrange(0, 8))
+        cycles.append({"start": start, "end": end, "flow": "medium"})
+        start = end + timedelta(days=rng.randrange(1, 40))
+    return cycles
+
+
+# Function to work out one user's gap statistics the slow way
+def brute_force_stats(cycles, trim=TRIM_FRACTION):
+    gaps = [(b["start"] - a["end"]).days for a, b in zip(cycles, cycles[1:])]
+    if not gaps:
+        return None
+    ordered = sorted(gaps)
+    cut = math.floor(len(gaps) * trim)
+    kept = ordered[cut:len(gaps) - cut]
+    return {
+        "count": len(gaps),
+        "mean": statistics.fmean(gaps),
+        "median": statistics.median(gaps),
+        "trimmed_mean": statistics.fmean(kept),
+        "weighted_mean": sum(k * gap for k, gap in enumerate(gaps, 1)) / sum(range(1, len(gaps) + 1)),
+        "std": statistics.pstdev(gaps),
+    }
+
+
+class GapStatisticsTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(4)
+        # Include users with no cycles and a single cycle, which have no gaps
+        self.users = [random_cycles(rng, count) for count in [0, 1, 2, 3, 5, 10, 21, 0, 1, 40, 7]]
+
+    def test_matches_brute_force(self):
+        stats = gap_statistics(*cycles_to_arrays(self.users))
+        for i, cycles in enumerate(self.users):
+            expected = brute_force_stats(cycles)
+            with self.subTest(user=i):
+                if expected is None:
+                    self.assertEqual(stats["count"][i], 0)
+                    for name in ("mean", "median", "trimmed_mean", "weighted_mean", "std"):
+                        self.assertTrue(np.isnan(stats[name][i]), name)
+                    continue
+                for name, value in expected.items():
+                    self.assertAlmostEqual(float(stats[name][i]), value, places=9, msg=name)
+
+    def test_no_cycles_at_all(self):
+        stats = gap_statistics(*cycles_to_arrays([[], []]))
+        self.assertEqual(list(stats["count"]), [0, 0])
+        self.assertTrue(np.isnan(stats["median"]).all())
+
+    def test_batch_matches_one_user_at_a_time(self):
+        batch = predict_batch(*cycles_to_arrays(self.users), method="median", z=2.0)
+        for i, cycles in enumerate(self.users):
+            single = predict_user(cycles, method="median", z=2.0)
+            with self.subTest(user=i):
+                if single is None:
+                    self.assertEqual(batch["predicted"][i], -1)
+                    continue
+                self.assertEqual(date.fromordinal(int(batch["predicted"][i])), single["next_start"])
+                self.assertEqual(date.fromordinal(int(batch["window_low"][i])), single["window_low"])
+                self.assertEqual(date.fromordinal(int(batch["window_high"][i])), single["window_high"])
+
+    def test_predicted_date(self):
+        cycles = [{"start": date(2024, 1, 1), "end": date(2024, 1, 5)},
+                  {"start": date(2024, 1, 30), "end": date(2024, 2, 3)},
+                  {"start": date(2024, 3, 1), "end": date(2024, 3, 5)}]
+        # Gaps of 25 and 27 days (2024 is a leap year): 26 days on average, give or take 1
+        prediction = predict_user(cycles)
+        self.assertEqual(prediction["next_start"], date(2024, 3, 31))
+        self.assertEqual(prediction["window_low"], date(2024, 3, 30))
+        self.assertEqual(prediction["window_high"], date(2024, 4, 1))
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            predict_batch(*cycles_to_arrays([[]]), method="mode")
+
+
+class ForecastTests(unittest.TestCase):
+    def setUp(self):
+        self.cycles = random_cycles(random.Random(16), 9)
+        self.stats = RunningStats()
+        for a, b in zip(self.cycles, self.cycles[1:]):
+            self.stats.add_gap((b["start"] - a["end"]).days)
+        self.stats.last_end = self.cycles[-1]["end"]
+
+    def test_running_stats_match_predict_user(self):
+        expected = predict_user(self.cycles, z=1.5)
+        prediction = predict_from_stats(self.stats, z=1.5)
+        for name in ("next_start", "window_low", "window_high"):
+            self.assertEqual(prediction[name], expected[name], name)
+        self.assertIsNone(predict_from_stats(RunningStats()))
+        self.assertIsNone(forecast_from_stats(RunningStats(), 5, 3))
+
+    def test_forecasts(self):
+        prediction = forecast_from_stats(self.stats, period_days=5, periods=4)
+        forecasts = prediction["forecasts"]
+        self.assertEqual(len(forecasts), 4)
+        self.assertEqual(forecasts[0]["start"], prediction["next_start"])
+
+        average_gap = self.stats.total / self.stats.count
+        for k, forecast in enumerate(forecasts, 1):
+            with self.subTest(period=k):
+                offset = math.floor(k * average_gap + (k - 1) * 5 + 1e-9)
+                self.assertEqual(forecast["start"], self.stats.last_end + timedelta(days=offset))
+                self.assertEqual(forecast["end"], forecast["start"] + timedelta(days=5))
+                self.assertEqual(forecast["ovulation"], forecast["start"] - timedelta(days=LUTEAL_DAYS))
+                self.assertEqual(forecast["fertile_start"], forecast["ovulation"] - timedelta(days=FERTILE_DAYS_BEFORE))
+                self.assertEqual(forecast["fertile_end"], forecast["ovulation"] + timedelta(days=FERTILE_DAYS_AFTER))
+                self.assertLessEqual(forecast["window_low"], forecast["start"])
+                if k > 1:  # Less certain the further ahead
+                    previous = forecasts[k - 2]
+                    self.assertGreaterEqual(forecast["window_high"] - forecast["start"],
+                                            previous["window_high"] - previous["start"])
+
+
+if __name__ == "__main__":
+    unittest.main()
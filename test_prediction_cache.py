@@ -0,0 +1,91 @@
+"""Tests for PredictionCache: hits, LRU eviction, expiry, variants and invalidation."""
+import unittest
+
+from prediction_cache import PredictionCache
+
+
+class PredictionCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.calls = 0
+
+    def make_cache(self, **options):
+        return PredictionCache(clock=lambda: self.now, **options)
+
+    def compute(self, value):
+        def work():
+            self.calls += 1
+            return value
+        return work
+
+    def test_hit_until_version_changes(self):
+        cache = self.make_cache()
+        self.assertEqual(cache.get("bob", 1, self.compute("a")), "a")
+        self.assertEqual(cache.get("bob", 1, self.compute("b")), "a")
+        self.assertEqual(cache.get("bob", 2, self.compute("c")), "c")  # New data version
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(cache), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = self.make_cache(max_entries=2)
+        cache.get("bob", 1, self.compute("bob"))
+        cache.get("amy", 1, self.compute("amy"))
+        cache.get("bob", 1, self.compute("bob"))  # bob is now the most recently used
+        cache.get("cat", 1, self.compute("cat"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.get("bob", 1, self.compute("new")), "bob")
+        self.assertEqual(cache.get("amy", 1, self.compute("new")), "new")
+
+    def test_entries_expire_after_ttl(self):
+        cache = self.make_cache(ttl=10)
+        cache.get("bob", 1, self.compute("old"))
+        self.now = 10
+        self.assertEqual(cache.get("bob", 1, self.compute("new")), "old")
+        self.now = 10.5
+        self.assertEqual(cache.get("bob", 1, self.compute("new")), "new")
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+        # A stale version is a plain miss, not an expiry
+        self.now = 100
+        cache.get("bob", 2, self.compute("newer"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_no_ttl_keeps_entries(self):
+        cache = self.make_cache()
+        cache.get("bob", 1, self.compute("a"))
+        self.now = 10 ** 9
+        self.assertEqual(cache.get("bob", 1, self.compute("b")), "a")
+
+    def test_variants_are_cached_separately(self):
+        cache = self.make_cache()
+        self.assertEqual(cache.get("bob", 1, self.compute(1), variant=1), 1)
+        self.assertEqual(cache.get("bob", 1, self.compute(3), variant=3), 3)
+        self.assertEqual(cache.get("bob", 1, self.compute("x"), variant=1), 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_invalidate_drops_every_variant(self):
+        cache = self.make_cache()
+        for variant in (None, 1, 3):
+            cache.get("bob", 1, self.compute(variant), variant=variant)
+        cache.get("amy", 1, self.compute("amy"))
+        cache.invalidate("bob")
+        cache.invalidate("nobody")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats()["invalidations"], 3)
+        self.assertEqual(cache.get("bob", 1, self.compute("fresh"), variant=3), "fresh")
+        self.assertEqual(cache.get("amy", 1, self.compute("fresh")), "amy")
+
+    def test_clear_resets_counters(self):
+        cache = self.make_cache(max_entries=1)
+        cache.get("bob", 1, self.compute("a"))
+        cache.get("amy", 1, self.compute("b"))
+        cache.clear()
+        self.assertEqual(cache.stats(), {"entries": 0, "hits": 0, "misses": 0, "hit_rate": 0.0,
+                                         "evictions": 0, "expirations": 0, "invalidations": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Tests for the headless HTTP/JSON service, run in-process on a free port with ServiceClient.
+
+NumPy is needed for the /predict test.
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+import passwords
+from service import ServiceClient, TrackerService
+from user_store import UserStore
+
+
+class ServiceTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.original_n = passwords.SCRYPT_N
+        passwords.SCRYPT_N = 2 ** 10  # Fast hashing; the cost itself is not under test
+        user_store = UserStore(os.path.join(self.folder.name, "users.db"), legacy_path=None)
+        self.service = TrackerService(workers=2, data_dir=os.path.join(self.folder.name, "data"), user_store=user_store)
+        self.server = await self.service.serve(port=0)  # Any free port
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.client = ServiceClient(port=self.port)
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+        passwords.SCRYPT_N = self.original_n
+        self.folder.cleanup()
+
+    async def log_in(self):
+        await self.client.register("smriti", "secret")
+        status, _ = await self.client.login("smriti", "secret")
+        self.assertEqual(status, 200)
+
+    async def test_register_and_duplicate(self):
+        status, reply = await self.client.register("smriti", "secret")
+        self.assertEqual((status, reply), (201, {"username": "smriti"}))
+        status, _ = await self.client.register("smriti", "other")
+        self.assertEqual(status, 409)
+
+    async def test_credentials_must_be_text(self):
+        for body in ({"username": None, "password": 1}, {"username": "bob"}, {"username": "", "password": "x"},
+                     {"username": ["bob"], "password": "x"}, ["bob", "x"]):
+            status, _ = await self.client.request("POST", "/register", body)
+            self.assertEqual(status, 400, body)
+            status, _ = await self.client.request("POST", "/login", body)
+            self.assertEqual(status, 400, body)
+        self.assertNotIn("None", self.service.user_store)
+
+    async def raw_request(self, data):
+        """Send raw bytes and return the status line of the reply (b"" if the connection just closed)."""
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(data)
+        await writer.drain()
+        status_line = await reader.readline()
+        writer.close()
+        return status_line
+
+    async def test_malformed_requests_get_a_400(self):
+        for data in (b"GARBAGE\r\n\r\n",
+                     b"POST /login HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+                     b"POST /login HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+                     b"GET /metrics HTTP/1.1\r\nno colon here\r\n\r\n"):
+            status_line = await self.raw_request(data)
+            self.assertTrue(status_line.startswith(b"HTTP/1.1 400"), (data, status_line))
+
+    async def test_unexpected_errors_are_logged(self):
+        async def broken(query, headers, body):
+            raise RuntimeError("boom")
+
+        self.service._metrics = broken
+        with self.assertLogs("service", level="ERROR") as logs:
+            status, reply = await self.client.request("GET", "/metrics")
+        self.assertEqual((status, reply), (500, {"error": "Internal server error."}))
+        self.assertIn("RuntimeError: boom", logs.output[0])
+
+    async def test_bad_login(self):
+        await self.client.register("smriti", "secret")
+        status, _ = await self.client.login("smriti", "wrong")
+        self.assertEqual(status, 401)
+        status, _ = await self.client.login("nobody", "secret")
+        self.assertEqual(status, 401)
+
+    async def test_logout_ends_the_session(self):
+        await self.log_in()
+        token = self.client.token
+        status, _ = await self.client.logout()
+        self.assertEqual(status, 200)
+        self.client.token = token  # Reuse the old token
+        status, _ = await self.client.list_cycles()
+        self.assertEqual(status, 401)
+
+    async def test_cycles_need_login(self):
+        status, _ = await self.client.list_cycles()
+        self.assertEqual(status, 401)
+
+    async def test_add_cycle_with_bad_dates(self):
+        await self.log_in()
+        status, reply = await self.client.add_cycle("2024-13-01", "2024-01-05")
+        self.assertEqual(status, 400)
+        self.assertIn("YYYY-MM-DD", reply["error"])
+        status, _ = await self.client.add_cycle("2024-01-05", "2024-01-01")
+        self.assertEqual(status, 400)
+        status, _ = await self.client.add_cycle("2024-01-01", "2024-01-05", "Heavy")
+        self.assertEqual(status, 400)
+
+    async def test_list_cycles_with_range(self):
+        await self.log_in()
+        for start, end in (("2024-01-01", "2024-01-05"), ("2024-02-01", "2024-02-04"), ("2024-03-01", "2024-03-05")):
+            status, _ = await self.client.add_cycle(start, end)
+            self.assertEqual(status, 201)
+
+        status, reply = await self.client.list_cycles()
+        self.assertEqual(status, 200)
+        self.assertEqual(len(reply["cycles"]), 3)
+
+        # A cycle counts if any of its days falls inside the range
+        status, reply = await self.client.list_cycles("2024-01-04", "2024-02-01")
+        self.assertEqual([cycle["start"] for cycle in reply["cycles"]], ["2024-01-01", "2024-02-01"])
+
+        status, _ = await self.client.list_cycles("01/02/2024")
+        self.assertEqual(status, 400)
+
+    async def test_predict(self):
+        await self.log_in()
+        status, reply = await self.client.predict()
+        self.assertEqual((status, reply), (200, {"prediction": None}))  # Fewer than two cycles
+
+        await self.client.add_cycle("2024-01-01", "2024-01-05")
+        await self.client.add_cycle("2024-01-30", "2024-02-03")
+        status, reply = await self.client.predict(2)
+        self.assertEqual(status, 200)
+        prediction = reply["prediction"]
+        self.assertEqual(prediction["next_start"], "2024-02-28")  # Last end plus the 25 day gap
+        self.assertEqual(len(prediction["forecasts"]), 2)
+        self.assertEqual(prediction["forecasts"][0]["start"], prediction["next_start"])
+        self.assertEqual(prediction["forecasts"][0]["ovulation"], "2024-02-14")
+
+
+if __name__ == "__main__":
+    unittest.main()
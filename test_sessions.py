@@ -0,0 +1,106 @@
+"""Tests for SessionManager: session tokens and the LRU of open users."""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from sessions import SessionManager
+
+
+class SessionTokenTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.sessions = SessionManager(data_dir=tempfile.gettempdir(), session_ttl=60, max_sessions=3,
+                                       clock=lambda: self.now)
+
+    def test_logout(self):
+        token = self.sessions.open_session("bob")
+        self.assertEqual(self.sessions.user_for(token), "bob")
+        self.sessions.close_session(token)
+        self.assertIsNone(self.sessions.user_for(token))
+        self.assertIsNone(self.sessions.user_for("made-up"))
+
+    def test_tokens_expire_unless_used(self):
+        used = self.sessions.open_session("bob")
+        idle = self.sessions.open_session("amy")
+        for _ in range(3):
+            self.now += 40
+            self.assertEqual(self.sessions.user_for(used), "bob")  # Each use keeps it alive
+        self.assertIsNone(self.sessions.user_for(idle))
+
+    def test_number_of_sessions_is_capped(self):
+        tokens = [self.sessions.open_session(f"user{i}") for i in range(3)]
+        self.sessions.user_for(tokens[0])  # Now the most recently used
+        newest = self.sessions.open_session("user3")
+        self.assertEqual(len(self.sessions._sessions), 3)
+        self.assertIsNone(self.sessions.user_for(tokens[1]))
+        self.assertEqual(self.sessions.user_for(tokens[0]), "user0")
+        self.assertEqual(self.sessions.user_for(newest), "user3")
+
+    def test_expired_tokens_are_dropped_on_login(self):
+        self.sessions.open_session("bob")
+        self.now += 61
+        self.sessions.open_session("amy")
+        self.assertEqual(len(self.sessions._sessions), 1)
+
+
+class ShardTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.sessions = SessionManager(max_open=2, data_dir=self.folder.name)
+        self.addCleanup(self.sessions.close)
+
+    def test_eviction_flushes_and_reopening_reloads(self):
+        with self.sessions.tracker("bob") as tracker:
+            tracker.add_cycle("2024-01-01", "2024-01-05", "light")
+            tracker.add_cycle("2024-02-01", "2024-02-05", "light")
+            stats_path = tracker.store.stats_path
+        self.assertFalse(os.path.exists(stats_path))  # Statistics are written on flush, not on every change
+
+        self.sessions.call("amy", "cycles")
+        self.sessions.call("eve", "cycles")  # Evicts bob, the least recently used
+        self.assertEqual(len(self.sessions), 2)
+        self.assertTrue(os.path.exists(stats_path))
+
+        with self.sessions.tracker("bob") as tracker:
+            self.assertEqual(len(tracker.cycles()), 2)
+            self.assertEqual(tracker.store.stats.count, 1)
+
+    def test_recently_used_users_stay_open(self):
+        with self.sessions.tracker("bob") as bob:
+            pass
+        self.sessions.call("amy", "cycles")
+        self.sessions.call("bob", "cycles")  # bob is now the most recently used
+        self.sessions.call("eve", "cycles")  # So amy is evicted
+        with self.sessions.tracker("bob") as tracker:
+            self.assertIs(tracker, bob)
+
+    def test_eviction_does_not_block_other_users(self):
+        sessions = SessionManager(max_open=1, data_dir=self.folder.name)
+        self.addCleanup(sessions.close)
+        token = sessions.open_session("amy")
+        holding = threading.Event()
+
+        def busy_request():
+            with sessions.tracker("bob"):
+                holding.set()
+                time.sleep(0.5)
+
+        busy = threading.Thread(target=busy_request)
+        busy.start()
+        holding.wait(5)
+        evicting = threading.Thread(target=sessions.call, args=("eve", "cycles"))  # Has to close bob
+        evicting.start()
+        time.sleep(0.05)
+
+        start = time.perf_counter()
+        self.assertEqual(sessions.user_for(token), "amy")
+        self.assertLess(time.perf_counter() - start, 0.2)
+        busy.join()
+        evicting.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Tests for UserStore: the SQLite user table and the users.json migration."""
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from user_store import UserStore
+
+
+class UserStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.db_path = os.path.join(self.folder.name, "users.db")
+        self.legacy_path = os.path.join(self.folder.name, "users.json")
+
+    def open_store(self):
+        store = UserStore(self.db_path, self.legacy_path)
+        self.addCleanup(lambda: store._connection().close())
+        return store
+
+    def test_users_json_is_migrated_once(self):
+        with open(self.legacy_path, "w") as file:
+            json.dump({"bob": "pw1", "amy": "pw2"}, file)
+        store = self.open_store()
+        self.assertEqual(list(store.usernames()), ["amy", "bob"])
+        self.assertEqual(store.get_password("bob"), "pw1")
+
+        # A later run does not import the file again, even if it has changed
+        store.set_password("bob", "new")
+        with open(self.legacy_path, "w") as file:
+            json.dump({"bob": "pw1", "cat": "pw3"}, file)
+        store = self.open_store()
+        self.assertEqual(store.get_password("bob"), "new")
+        self.assertNotIn("cat", store)
+
+    def test_missing_users_json(self):
+        store = self.open_store()
+        self.assertEqual(list(store.usernames()), [])
+        self.assertIsNone(store.get_password("bob"))
+
+    def test_duplicate_username_is_refused(self):
+        store = self.open_store()
+        self.assertTrue(store.add_user("bob", "pw1"))
+        self.assertFalse(store.add_user("bob", "pw2"))
+        self.assertEqual(store.get_password("bob"), "pw1")
+        self.assertIn("bob", store)
+        self.assertNotIn("amy", store)
+
+    def test_import_users_skips_existing(self):
+        store = self.open_store()
+        store.add_user("bob", "pw1")
+        self.assertEqual(store.import_users([("bob", "other"), ("amy", "pw2"), ("cat", "pw3")]), 2)
+        self.assertEqual(store.get_password("bob"), "pw1")
+        self.assertEqual(list(store.usernames()), ["amy", "bob", "cat"])
+
+    def test_concurrent_registrations_of_one_name(self):
+        store = self.open_store()
+        results = []
+
+        def register(password):
+            results.append(store.add_user("bob", password))
+            store._connection().close()  # Each thread opened its own connection
+
+        threads = [threading.Thread(target=register, args=(f"pw{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
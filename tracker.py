@@ -1,21 +1,25 @@
 import tkinter as tk
 from tkcalendar import Calendar
-from datetime import datetime, timedelta
 from tkinter import messagebox
+from core import MenstrualTracker
+from period_calendar import PeriodCalendar
+from background import BackgroundRunner
 
 class MenstrualTrackerApp:
-    def __init__(self, root):
+    def __init__(self, root, username, runner=None):
         self.root = root
+        self.runner = runner or BackgroundRunner(root)  # Disk access and predictions run off the Tk thread
         self.root.title("Menstrual Tracker")
         self.root.geometry("600x600")
         self.root.configure(bg="#f9c8d3")  # Set background color to light pink
 
-        # Initialize the list of past cycles to keep track of entered data
-        self.past_cycles = []
+        self.tracker = None  # Set once the user's saved cycles have been loaded
+        self.root.protocol("WM_DELETE_WINDOW", self.close)  # Save the user's files when the window is closed
 
         # Set up the calendar with highlighting of periods
         self.calendar = Calendar(self.root, selectmode="day", date_pattern="yyyy-mm-dd", font=("Arial", 12))
         self.calendar.pack(pady=20)  # Ensure the calendar is packed and visible
+        self.period_calendar = PeriodCalendar(self.calendar)  # Draws periods for the displayed month only
 
         # Input fields for start and end dates, and flow type
         self.create_input_fields()
@@ -26,6 +30,38 @@ class MenstrualTrackerApp:
         # Label and text box to display cycle history and predictions
         self.create_history_and_prediction_widgets()
 
+        # Open the user's saved cycles (sorted by start date) in the background so the window appears straight away
+        self.set_busy(True)
+        self.runner.submit(MenstrualTracker, username, on_done=self.tracker_loaded, on_error=self.task_failed)
+
+    def tracker_loaded(self, tracker):
+        """Called on the Tk thread once the saved cycles have been loaded."""
+        self.tracker = tracker
+        # Show the cycles that were saved in earlier sessions (drawn once, for this month)
+        self.period_calendar.add_periods((cycle["start"], cycle["end"], cycle["flow"]) for cycle in tracker.cycles())
+        self.set_busy(False)
+
+    def close(self):
+        """Finish any saves in progress or queued, close the user's files (writing the snapshot) and close the window."""
+        self.runner.shutdown(wait=True, cancel_futures=False)  # A save can be queued behind a prediction
+        if self.tracker is not None:
+            self.tracker.close()
+        self.root.destroy()
+
+    def set_busy(self, busy):
+        """Disable the buttons while the cycle data is being loaded or saved."""
+        state = "disabled" if busy else "normal"
+        self.add_button.config(state=state)
+        self.predict_button.config(state=state)
+
+    def task_failed(self, error):
+        """Show an error raised by background work."""
+        self.set_busy(self.tracker is None)
+        if isinstance(error, ValueError):
+            messagebox.showerror("Invalid Date", str(error))
+        else:
+            messagebox.showerror("Error", str(error))
+
     def create_input_fields(self):
         """Create input fields for start date, end date, and flow type."""
         self.start_date_label = tk.Label(self.root, text="Start Date (YYYY-MM-DD):", font=("Arial", 12), bg="#f9c8d3", fg="#9c4d7d")
@@ -67,19 +103,17 @@ class MenstrualTrackerApp:
         end_date = self.end_date_entry.get()
         flow = self.flow_var.get()
 
-        # Basic input validation to ensure dates are entered in the correct format
-        try:
-            start_date_obj = datetime.strptime(start_date, "%Y-%m-%d")
-            end_date_obj = datetime.strptime(end_date, "%Y-%m-%d")
-        except ValueError:
-            messagebox.showerror("Invalid Date", "Please enter the date in the format YYYY-MM-DD.")
-            return
+        # Validate the dates (YYYY-MM-DD, end not before start) and save the cycle in the background
+        self.set_busy(True)
+        self.runner.submit(self.tracker.add_cycle, start_date, end_date, flow, on_done=self.cycle_added, on_error=self.task_failed)
 
-        # Store the cycle in the list of past cycles for later use in predictions
-        self.past_cycles.append({"start": start_date_obj, "end": end_date_obj, "flow": flow})
+    def cycle_added(self, cycle):
+        """Called on the Tk thread once a cycle has been saved."""
+        self.set_busy(False)
+        start_date, end_date, flow = cycle["start"].strftime("%Y-%m-%d"), cycle["end"].strftime("%Y-%m-%d"), cycle["flow"]
 
         # Highlight the cycle on the calendar
-        self.highlight_calendar(start_date_obj, end_date_obj, flow)
+        self.highlight_calendar(cycle["start"], cycle["end"], flow)
 
         # Clear input fields for the next entry
         self.start_date_entry.delete(0, tk.END)
@@ -89,30 +123,22 @@ class MenstrualTrackerApp:
 
     def highlight_calendar(self, start_date, end_date, flow):
         """Highlight the calendar with the start and end dates of the period."""
-        current_date = start_date
-        while current_date <= end_date:
-            # Create an event on each date of the period, tagged by flow type
-            self.calendar.calevent_create(current_date, 'Period', tags=flow)
-            current_date += timedelta(days=1)
+        # Days are only turned into calendar events when their month is on screen
+        self.period_calendar.add_period(start_date, end_date, flow)
 
     def predict_next_period(self):
         """Predict the next period based on average cycle length from past cycles."""
-        if len(self.past_cycles) < 2:  # Need at least two cycles to predict
+        # Work out the prediction from the running average gap kept by the store (cached until the cycles change)
+        self.runner.submit(self.tracker.predict_next_period, on_done=self.show_prediction, on_error=self.task_failed)
+
+    def show_prediction(self, prediction):
+        """Called on the Tk thread with the result of predict_next_period."""
+        if prediction is None:  # Need at least two cycles to predict
             messagebox.showerror("Not Enough Data", "Please add at least two cycles to predict the next period.")
             return
 
-        # Calculate the average cycle length (difference between consecutive cycles)
-        cycle_lengths = []
-        for i in range(1, len(self.past_cycles)):
-            prev_cycle_end = self.past_cycles[i - 1]["end"]
-            current_cycle_start = self.past_cycles[i]["start"]
-            cycle_lengths.append((current_cycle_start - prev_cycle_end).days)
-
-        avg_cycle_length = sum(cycle_lengths) / len(cycle_lengths)
-
-        # Predict the next start date based on the average cycle length
-        last_cycle_end = self.past_cycles[-1]["end"]
-        next_period_start = last_cycle_end + timedelta(days=avg_cycle_length)
-
-        # Display the predicted next period start date
-        self.prediction_label.config(text=f"Predicted next period start date: {next_period_start.strftime('%Y-%m-%d')}")
+        # Display the predicted next period start date, the likely range around it and the fertile window before it
+        upcoming = prediction["forecasts"][0]
+        self.prediction_label.config(text=f"Predicted next period start date: {prediction['next_start'].strftime('%Y-%m-%d')}\n"
+                                          f"(likely between {prediction['window_low']:%Y-%m-%d} and {prediction['window_high']:%Y-%m-%d})\n"
+                                          f"Estimated fertile window: {upcoming['fertile_start']:%Y-%m-%d} to {upcoming['fertile_end']:%Y-%m-%d}")
@@ -0,0 +1,96 @@
+import json
+import sqlite3
+import threading
+
+from instrumentation import timed
+
+# SQLite database that holds the user accounts
+DB_PATH = "users.db"
+
+# Old whole-file user list, imported into the database the first time it is opened
+LEGACY_USERS_PATH = "users.json"
+
+
+# Class to look up and add users without rewriting every account on each change
+class UserStore:
+    def __init__(self, path=DB_PATH, legacy_path=LEGACY_USERS_PATH):
+        """Open the user database, creating it and importing users.json if needed."""
+        self.path = path
+        self._local = threading.local()  # SQLite connections may not be shared between threads
+
+        conn = self._connection()
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT NOT NULL)")
+
+        # user_version is 0 until the legacy file has been migrated once
+        if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            if legacy_path:
+                self.import_json(legacy_path)
+            conn.execute("PRAGMA user_version = 1")
+
+    @timed("users.get_password")
+    def get_password(self, username):
+        """Return the stored password for a user, or None if the user does not exist."""
+        row = self._connection().execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    @timed("users.add_user")
+    def add_user(self, username, password):
+        """Add a new user. Returns False if the username is already taken."""
+        conn = self._connection()
+        with conn:  # One transaction, so two registrations cannot overwrite each other
+            cursor = conn.execute("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)", (username, password))
+        return cursor.rowcount == 1
+
+    def set_password(self, username, password):
+        """Replace the stored password of an existing user."""
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE users SET password = ? WHERE username = ?", (password, username))
+
+    def import_users(self, users):
+        """Bulk insert (username, password) pairs in one transaction, skipping existing users."""
+        conn = self._connection()
+        with conn:
+            cursor = conn.executemany("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)", users)
+        return cursor.rowcount
+
+    def import_json(self, path):
+        """Import the users from an old users.json file. Returns the number of users added."""
+        try:
+            with open(path, "r") as file:
+                users = json.load(file)
+        except FileNotFoundError:
+            return 0
+        return self.import_users(users.items())
+
+    def usernames(self):
+        """Yield every username, reading the table in order rather than all at once."""
+        cursor = self._connection().execute("SELECT username FROM users ORDER BY username")
+        for (username,) in cursor:
+            yield username
+
+    def __contains__(self, username):
+        return self.get_password(username) is not None
+
+    def _connection(self):
+        """Return this thread's connection to the database, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)  # Wait for other writers instead of failing
+            conn.execute("PRAGMA journal_mode = WAL")  # Readers are not blocked while someone registers
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+_store = None
+
+
+# Function to get the shared user store used by the login pages
+def get_user_store():
+    """Return the application's user store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = UserStore()
+    return _store